@@ -1,3 +1,40 @@
 from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
 
-# Register your models here.
+from .models import EmailOutbox, EmailVerification
+from .utils import queue_verification_campaign
+
+
+@admin.register(EmailVerification)
+class EmailVerificationAdmin(admin.ModelAdmin):
+    list_display = ("user", "is_verified", "created_at")
+    list_filter = ("is_verified",)
+    search_fields = ("user__email",)
+    list_select_related = ("user",)
+    readonly_fields = ("token", "created_at")
+    actions = ["resend_verification"]
+
+    def resend_verification(self, request, queryset):
+        queued = queue_verification_campaign(queryset)
+        self.message_user(
+            request, _("Se encolaron {} correos de verificación").format(queued)
+        )
+
+    resend_verification.short_description = _(
+        "Reenviar verificación a los no verificados"
+    )
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        "to_email",
+        "template",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+    )
+    list_filter = ("status", "template")
+    search_fields = ("to_email",)
+    readonly_fields = ("created_at", "sent_at", "last_error")
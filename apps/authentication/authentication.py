@@ -1,30 +1,90 @@
 import jwt
+from asgiref.sync import sync_to_async
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from django.conf import settings
+from apps.authentication.cache import token_cache
+from apps.authentication.keys import decode_jwt
 from apps.authentication.models import BlacklistedToken, AuthToken
 from apps.manager.models import User
 
 
 class JWTAuthentication(BaseAuthentication):
     def authenticate(self, request):
-        auth_header = request.headers.get("Authorization")
-
-        if not auth_header or not auth_header.startswith("Bearer "):
+        token = self.get_token(request)
+        if token is None:
             return None
 
-        token = auth_header.split(" ")[1]
+        cached = token_cache.get(token)
+        if cached is not None:
+            payload, snapshot = cached
+            return (self.user_from_snapshot(snapshot), token)
 
         if BlacklistedToken.is_blacklisted(token):
             raise AuthenticationFailed("Token inválido o revocado.")
 
+        payload = self.decode_token(token)
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
             user = User.objects.get(id=payload["user_id"])
-            return (user, token)
+        except User.DoesNotExist:
+            raise AuthenticationFailed("Usuario no encontrado.")
+
+        token_cache.set(token, payload, user)
+        return (user, token)
+
+    async def aauthenticate(self, request):
+        """Versión async de authenticate() para las vistas ASGI."""
+        token = self.get_token(request)
+        if token is None:
+            return None
+
+        cached = token_cache.get(token)
+        if cached is not None:
+            payload, snapshot = cached
+            return (self.user_from_snapshot(snapshot), token)
+
+        # El índice de revocación puede recargarse desde la BD
+        if await sync_to_async(BlacklistedToken.is_blacklisted)(token):
+            raise AuthenticationFailed("Token inválido o revocado.")
+
+        payload = self.decode_token(token)
+        try:
+            user = await User.objects.aget(id=payload["user_id"])
+        except User.DoesNotExist:
+            raise AuthenticationFailed("Usuario no encontrado.")
+
+        token_cache.set(token, payload, user)
+        return (user, token)
+
+    @staticmethod
+    def get_token(request):
+        auth_header = request.headers.get("Authorization")
+
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return None
+
+        return auth_header.split(" ")[1]
+
+    @staticmethod
+    def decode_token(token):
+        try:
+            payload = decode_jwt(token)
         except jwt.ExpiredSignatureError:
             raise AuthenticationFailed("Token expirado.")
         except jwt.InvalidTokenError:
             raise AuthenticationFailed("Token inválido.")
-        except User.DoesNotExist:
-            raise AuthenticationFailed("Usuario no encontrado.")
+        # Los refresh tokens también son JWT firmados: no valen como acceso
+        if payload.get("type") == "refresh":
+            raise AuthenticationFailed("Token inválido.")
+        return payload
+
+    @staticmethod
+    def user_from_snapshot(snapshot):
+        # Instancia con el resto de campos diferidos: se cargan bajo demanda
+        # y save() solo escribe los campos presentes en la copia.
+        # from_db() espera los valores en el orden de los campos concretos
+        fields = [
+            field.attname
+            for field in User._meta.concrete_fields
+            if field.attname in snapshot
+        ]
+        return User.from_db("default", fields, [snapshot[f] for f in fields])
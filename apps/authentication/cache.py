@@ -0,0 +1,124 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """
+    Caché LRU con TTL, local al proceso, de tokens ya verificados.
+
+    Guarda el payload decodificado y una copia reducida del usuario para
+    evitar las consultas a la base de datos en cada petición autenticada.
+    """
+
+    USER_FIELDS = (
+        "id",
+        "email",
+        "username",
+        "first_name",
+        "last_name",
+        "is_active",
+        "is_staff",
+        "is_superuser",
+    )
+
+    def __init__(self, max_size=10000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        digest = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, payload, snapshot = entry
+            if expires_at <= time.monotonic():
+                self._remove(digest)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return payload, snapshot
+
+    def set(self, token, payload, user):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+
+        ttl = self.ttl
+        # Nunca mantener en caché un token más allá de su expiración
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - time.time())
+            if ttl <= 0:
+                return
+
+        digest = token_digest(token)
+        snapshot = {field: getattr(user, field) for field in self.USER_FIELDS}
+        with self._lock:
+            if digest in self._entries:
+                self._remove(digest)
+            self._entries[digest] = (time.monotonic() + ttl, payload, snapshot)
+            self._by_user.setdefault(snapshot["id"], set()).add(digest)
+
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_token(self, token):
+        if not token:
+            return
+        digest = token_digest(token)
+        with self._lock:
+            self._remove(digest)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for digest in list(self._by_user.get(user_id, ())):
+                self._remove(digest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+    def _remove(self, digest):
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        user_id = entry[2]["id"]
+        digests = self._by_user.get(user_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[user_id]
+
+
+_config = getattr(settings, "JWT_AUTH_CACHE", {})
+
+token_cache = TokenCache(
+    max_size=_config.get("MAX_SIZE", 10000),
+    ttl=_config.get("TTL", 60),
+)
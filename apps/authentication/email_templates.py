@@ -0,0 +1,55 @@
+from functools import lru_cache
+
+from django.template import Context, engines
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+# Clave de plantilla -> asunto y plantilla HTML
+EMAIL_TEMPLATES = {
+    "verify_email": {
+        "subject": "Confirma tu correo electrónico",
+        "template": "emails/verify_email.html",
+    },
+    "reset_password": {
+        "subject": "Restablece tu contraseña",
+        "template": "emails/reset_password.html",
+    },
+}
+
+
+class CompiledEmailTemplate:
+    """
+    Plantilla de correo compilada una sola vez, con su variante de texto.
+
+    La versión en texto plano se obtiene quitando las etiquetas HTML del
+    código de la plantilla (no de cada correo renderizado) y se renderiza
+    sin autoescape, así que cada envío se ahorra el strip_tags().
+    """
+
+    def __init__(self, key):
+        email = EMAIL_TEMPLATES[key]
+        self.key = key
+        self.subject = email["subject"]
+        self.html = get_template(email["template"]).template
+        text_source = strip_tags(self.html.source)
+        self.text = (
+            engines["django"]
+            .from_string("{% autoescape off %}" + text_source + "{% endautoescape %}")
+            .template
+        )
+
+    def render(self, context):
+        """Devuelve (html, texto) para un contexto."""
+        return next(self.render_many([context]))
+
+    def render_many(self, contexts):
+        """Genera (html, texto) por contexto reutilizando un único Context."""
+        context = Context(autoescape=True)
+        for values in contexts:
+            with context.push(values):
+                yield self.html.render(context), self.text.render(context)
+
+
+@lru_cache(maxsize=None)
+def get_email_template(key):
+    return CompiledEmailTemplate(key)
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 con las iteraciones de PASSWORD_HASH_ITERATIONS.
+
+    Mantiene el algoritmo "pbkdf2_sha256", así que verifica los hashes ya
+    guardados; los que usan otro número de iteraciones se recalculan en el
+    siguiente login correcto (must_update).
+    """
+
+    @property
+    def iterations(self):
+        return (
+            getattr(settings, "PASSWORD_HASH_ITERATIONS", None)
+            or PBKDF2PasswordHasher.iterations
+        )
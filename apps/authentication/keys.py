@@ -0,0 +1,148 @@
+import functools
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from jwt.algorithms import get_default_algorithms, has_crypto
+
+from apps.authentication.cache import token_cache
+
+# Algoritmos de clave pública: su clave de verificación se publica en el JWKS
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "ES256", "ES384", "RS256", "PS256")
+DEFAULT_ALGORITHM = "HS256"
+
+
+class SigningKey:
+    """Clave del keyring ya preparada por PyJWT: no se reparsea por token."""
+
+    def __init__(self, kid, algorithm, signing_key, verifying_key):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.verifying_key = verifying_key
+
+    @property
+    def is_asymmetric(self):
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def to_jwk(self):
+        jwk = get_default_algorithms()[self.algorithm].to_jwk(
+            self.verifying_key, as_dict=True
+        )
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+def read_key(config, name):
+    """Clave PEM en línea (NAME) o en un fichero (NAME_FILE)."""
+    if config.get(name):
+        return config[name]
+    if config.get(f"{name}_FILE"):
+        with open(config[f"{name}_FILE"], "rb") as key_file:
+            return key_file.read()
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def get_key(kid):
+    """
+    Clave `kid` de JWT_KEYS["KEYS"]; kid None es la clave por defecto
+    (SECRET_KEY con HS256), la de los tokens emitidos sin kid.
+    """
+    algorithms = get_default_algorithms()
+    if kid is None:
+        secret = algorithms[DEFAULT_ALGORITHM].prepare_key(settings.SECRET_KEY)
+        return SigningKey(None, DEFAULT_ALGORITHM, secret, secret)
+
+    config = settings.JWT_KEYS.get("KEYS", {}).get(kid)
+    if config is None:
+        raise jwt.InvalidTokenError(f"Clave de firma desconocida: {kid}")
+
+    algorithm_name = config.get("ALGORITHM", DEFAULT_ALGORITHM)
+    if algorithm_name not in algorithms:
+        if algorithm_name in ASYMMETRIC_ALGORITHMS and not has_crypto:
+            raise ImproperlyConfigured(
+                f"La clave {kid} usa {algorithm_name}: instala 'cryptography'"
+            )
+        raise ImproperlyConfigured(f"Algoritmo JWT no soportado: {algorithm_name}")
+    algorithm = algorithms[algorithm_name]
+
+    if algorithm_name not in ASYMMETRIC_ALGORITHMS:
+        secret = algorithm.prepare_key(config["SECRET"])
+        return SigningKey(kid, algorithm_name, secret, secret)
+
+    private_key = read_key(config, "PRIVATE_KEY")
+    public_key = read_key(config, "PUBLIC_KEY")
+    if private_key is not None:
+        signing_key = algorithm.prepare_key(private_key)
+        verifying_key = (
+            algorithm.prepare_key(public_key)
+            if public_key is not None
+            else signing_key.public_key()
+        )
+    elif public_key is not None:
+        # Clave solo de verificación, p. ej. de otro servicio
+        signing_key, verifying_key = None, algorithm.prepare_key(public_key)
+    else:
+        raise ImproperlyConfigured(f"La clave {kid} no tiene PRIVATE_KEY ni PUBLIC_KEY")
+    return SigningKey(kid, algorithm_name, signing_key, verifying_key)
+
+
+def accepts_legacy_kid():
+    return settings.JWT_KEYS.get("ACCEPT_LEGACY_KID", True)
+
+
+def get_active_key():
+    kid = settings.JWT_KEYS.get("ACTIVE_KID") or None
+    if kid is None and not accepts_legacy_kid():
+        raise ImproperlyConfigured(
+            "JWT_KEYS: sin ACCEPT_LEGACY_KID hace falta un ACTIVE_KID"
+        )
+    return get_key(kid)
+
+
+def encode_jwt(payload):
+    """Firma payload con la clave activa y su kid en la cabecera."""
+    key = get_active_key()
+    if key.signing_key is None:
+        raise ImproperlyConfigured(f"La clave activa {key.kid} no tiene clave privada")
+    headers = {"kid": key.kid} if key.kid is not None else None
+    return jwt.encode(
+        payload, key.signing_key, algorithm=key.algorithm, headers=headers
+    )
+
+
+def decode_jwt(token):
+    """
+    Verifica token con la clave de su kid (o la por defecto si no lo trae y
+    ACCEPT_LEGACY_KID lo permite). Lanza jwt.InvalidTokenError si el token
+    o su kid no son válidos.
+    """
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is not None and not isinstance(kid, str):
+        raise jwt.InvalidTokenError("kid inválido")
+    if kid is None and not accepts_legacy_kid():
+        # SECRET_KEY retirada del keyring: solo valen los tokens con kid
+        raise jwt.InvalidTokenError("Token sin kid")
+    key = get_key(kid)
+    # Solo el algoritmo de esa clave: impide cambiarlo desde la cabecera
+    return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+
+def get_jwks():
+    """Claves públicas del keyring en formato JWKS; las HMAC nunca se publican."""
+    keys = []
+    for kid in settings.JWT_KEYS.get("KEYS", {}):
+        key = get_key(kid)
+        if key.is_asymmetric:
+            keys.append(key.to_jwk())
+    return {"keys": keys}
+
+
+@receiver(setting_changed)
+def clear_key_cache(setting, **kwargs):
+    if setting in ("JWT_KEYS", "SECRET_KEY"):
+        get_key.cache_clear()
+        # Los tokens ya verificados pueden no valer con el keyring nuevo
+        token_cache.clear()
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.authentication.models import AuthToken, BlacklistedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Rellena por lotes los digest SHA-256 de AuthToken y BlacklistedToken "
+        "en las filas creadas antes de existir esas columnas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        for model, digest_field, fields in (
+            (
+                AuthToken,
+                "refresh_token_digest",
+                ["access_token_digest", "refresh_token_digest"],
+            ),
+            (BlacklistedToken, "token_digest", ["token_digest"]),
+        ):
+            started = time.perf_counter()
+            updated = 0
+            pending = model.objects.filter(**{f"{digest_field}__isnull": True})
+            while True:
+                with transaction.atomic():
+                    rows = list(pending.order_by("pk")[:batch_size])
+                    if not rows:
+                        break
+                    for row in rows:
+                        row.set_digests()
+                    model.objects.bulk_update(rows, fields)
+                updated += len(rows)
+                self.stdout.write(f"  {model.__name__}: {updated}")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model.__name__}: {updated} filas actualizadas en "
+                    f"{time.perf_counter() - started:.1f} s"
+                )
+            )
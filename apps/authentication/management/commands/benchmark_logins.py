@@ -0,0 +1,193 @@
+import io
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.authentication.cache import token_digest
+from apps.authentication.models import AuthToken, BlacklistedToken, RefreshTokenFamily
+from apps.authentication.utils import generate_access_token, generate_session_tokens
+from apps.manager.models import User
+
+BENCH_EMAIL = "bench-login-{}@benchmark.local"
+BENCH_PASSWORD = "benchmark-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide logins/s: primero solo la escritura de la sesión (revocar + "
+        "insertar AuthToken frente a RefreshTokenFamily.start) y después el "
+        "login completo por WSGI con distintas iteraciones de PBKDF2."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--sessions", type=int, default=2_000)
+        parser.add_argument("--logins", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--iterations",
+            default="1000000,260000,100000",
+            help="Iteraciones de PBKDF2 a comparar, separadas por comas",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            iterations = [int(value) for value in options["iterations"].split(",")]
+        except ValueError:
+            raise CommandError("--iterations debe ser una lista de enteros")
+
+        users = self.seed_users(options["users"])
+        revoked = []
+        try:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"\n== Escritura de la sesión: {options['sessions']} logins, "
+                    f"{options['concurrency']} hilos =="
+                )
+            )
+            for label, write in (
+                ("revocar + insertar", lambda user: self.legacy_session(user, revoked)),
+                ("familia (RefreshTokenFamily.start)", self.start_family),
+            ):
+                # Cada usuario parte de una sesión activa que hay que sustituir
+                for user in users:
+                    self.start_family(user)
+                    self.legacy_session(user, revoked)
+                self.report(
+                    label,
+                    *self.run(
+                        write,
+                        [users[i % len(users)] for i in range(options["sessions"])],
+                        options["concurrency"],
+                    ),
+                )
+
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"\n== Login completo (POST /api/auth/login/): "
+                    f"{options['logins']} logins, {options['concurrency']} hilos =="
+                )
+            )
+            for count in iterations:
+                with override_settings(PASSWORD_HASH_ITERATIONS=count):
+                    # Hashes ya con estas iteraciones: sin rehash en el login
+                    User.objects.filter(pk__in=[u.pk for u in users]).update(
+                        password=make_password(BENCH_PASSWORD)
+                    )
+                    self.report(
+                        f"PBKDF2 {count} iteraciones",
+                        *self.run(
+                            self.http_login,
+                            [users[i % len(users)] for i in range(options["logins"])],
+                            options["concurrency"],
+                        ),
+                    )
+        finally:
+            self.cleanup(users, revoked)
+
+    def seed_users(self, count):
+        emails = [BENCH_EMAIL.format(i) for i in range(count)]
+        present = set(
+            User.objects.filter(email__in=emails).values_list("email", flat=True)
+        )
+        User.objects.bulk_create(
+            [
+                User(email=email, password="!")
+                for email in emails
+                if email not in present
+            ],
+            batch_size=1000,
+        )
+        return list(User.objects.filter(email__in=emails).order_by("id"))
+
+    def legacy_session(self, user, revoked):
+        # El login anterior: revocar la sesión activa e insertar otra,
+        # cada escritura en su propia transacción
+        active_token = AuthToken.get_active_token(user)
+        if active_token:
+            revoked.append(active_token.refresh_token)
+            active_token.revoke()
+        AuthToken.objects.create(
+            user=user,
+            access_token=generate_access_token(user),
+            refresh_token=str(uuid.uuid4()),
+            expires_at=timezone.now() + timedelta(days=7),
+        )
+
+    def start_family(self, user):
+        generate_session_tokens(RefreshTokenFamily.start(user))
+
+    def http_login(self, user):
+        from config.wsgi import application
+
+        body = json.dumps({"email": user.email, "password": BENCH_PASSWORD}).encode()
+        environ = {
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": "/api/auth/login/",
+            "SERVER_NAME": "localhost",
+            "HTTP_HOST": "localhost",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        response = application(environ, lambda status, *args: statuses.append(status))
+        b"".join(response)
+        response.close()
+        if not statuses[0].startswith("200"):
+            raise CommandError(f"Login fallido: HTTP {statuses[0]}")
+
+    def run(self, action, users, concurrency):
+        errors = []
+        lock = threading.Lock()
+
+        def timed(user):
+            started = time.perf_counter()
+            try:
+                action(user)
+            except DatabaseError as exc:
+                # p. ej. "database is locked" en SQLite con muchos escritores
+                with lock:
+                    errors.append(exc)
+            finally:
+                connection.close()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            latencies = list(pool.map(timed, users))
+        throughput = len(users) / (time.perf_counter() - started)
+        return throughput, latencies, len(errors)
+
+    def report(self, label, throughput, latencies, errors):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        line = (
+            f"{label}: {throughput:.1f} logins/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {p95 * 1000:.1f} ms"
+        )
+        if errors:
+            line += f", {errors} errores de BD"
+        self.stdout.write(line)
+
+    def cleanup(self, users, revoked):
+        digests = [token_digest(token) for token in revoked]
+        with transaction.atomic():
+            for start in range(0, len(digests), 500):
+                BlacklistedToken.objects.filter(
+                    token_digest__in=digests[start : start + 500]
+                ).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
@@ -0,0 +1,128 @@
+import io
+import json
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.authentication.models import AuthToken, RefreshTokenFamily
+from apps.authentication.utils import generate_access_token, generate_session_tokens
+
+from .benchmark_logins import Command as LoginBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide refrescos/s por WSGI con refresh tokens firmados por familia "
+        "frente al canje de un refresh token opaco de AuthToken, y las "
+        "consultas de cada uno."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--refreshes", type=int, default=40)
+        parser.add_argument("--concurrency", type=int, default=8)
+
+    def handle(self, *args, **options):
+        from config.wsgi import application
+
+        self.application = application
+        seeder = LoginBenchmark(stdout=self.stdout, stderr=self.stderr)
+        users = seeder.seed_users(options["users"])
+        # Al canjearlos, los tokens opacos quedan en BlacklistedToken
+        legacy = [self.legacy_token(user) for user in users]
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                tokens = self.refresh(legacy[0])
+            legacy_queries = len(queries)
+            self.report(
+                "AuthToken (opaco)",
+                *self.run(lambda token: [self.refresh(token)], legacy[1:], options),
+                legacy_queries,
+            )
+
+            with CaptureQueriesContext(connection) as queries:
+                self.refresh(tokens["refresh_token"])
+            family_queries = len(queries)
+
+            def chain(token):
+                # Cada cliente encadena sus refrescos con el token recibido
+                latencies = []
+                for _ in range(options["refreshes"]):
+                    started = time.perf_counter()
+                    token = self.refresh(token)["refresh_token"]
+                    latencies.append(time.perf_counter() - started)
+                return latencies
+
+            families = [
+                generate_session_tokens(RefreshTokenFamily.start(user))["refresh_token"]
+                for user in users
+            ]
+            self.report(
+                "familia (JWT firmado)",
+                *self.run(chain, families, options, timed=False),
+                family_queries,
+            )
+        finally:
+            seeder.cleanup(users, legacy)
+
+    def legacy_token(self, user):
+        token = str(uuid.uuid4())
+        AuthToken.objects.create(
+            user=user,
+            access_token=generate_access_token(user),
+            refresh_token=token,
+            expires_at=timezone.now() + timedelta(days=7),
+        )
+        return token
+
+    def refresh(self, refresh_token):
+        body = json.dumps({"refresh_token": refresh_token}).encode()
+        environ = {
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": "/api/auth/refresh/",
+            "SERVER_NAME": "localhost",
+            "HTTP_HOST": "localhost",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        response = self.application(
+            environ, lambda status, *args: statuses.append(status)
+        )
+        content = b"".join(response)
+        response.close()
+        if not statuses[0].startswith("200"):
+            raise CommandError(f"Refresco fallido: HTTP {statuses[0]} {content!r}")
+        return json.loads(content)
+
+    def run(self, action, tokens, options, timed=True):
+        def call(token):
+            started = time.perf_counter()
+            latencies = action(token)
+            return [time.perf_counter() - started] if timed else latencies
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            latencies = [
+                latency for batch in pool.map(call, tokens) for latency in batch
+            ]
+        return len(latencies) / (time.perf_counter() - started), latencies
+
+    def report(self, label, throughput, latencies, queries):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{label}: {throughput:.1f} refrescos/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {p95 * 1000:.1f} ms, {queries} consultas por refresco"
+        )
@@ -0,0 +1,161 @@
+import datetime
+import random
+import secrets
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.authentication.models import AuthToken, BlacklistedToken, token_lookup
+from apps.authentication.purge import purge_queryset
+from apps.manager.models import User
+
+BENCH_EMAIL = "bench-tokens@benchmark.local"
+BENCH_PREFIX = "bench-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula días de sesiones (AuthToken y BlacklistedToken) y mide la "
+        "latencia de búsqueda por token a medida que las tablas envejecen, "
+        "sin purga y con purge_expired_tokens tras cada día."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=10)
+        parser.add_argument("--tokens-per-day", type=int, default=10_000)
+        parser.add_argument(
+            "--lifetime",
+            type=int,
+            default=2,
+            help="Días de vida de cada token antes de caducar",
+        )
+        parser.add_argument("--lookups", type=int, default=2_000)
+        parser.add_argument("--batch-size", type=int, default=1_000)
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(
+            email=BENCH_EMAIL, defaults={"password": "!"}
+        )
+        try:
+            without = self.run_phase(user, options, purge=False)
+            with_purge = self.run_phase(user, options, purge=True)
+        finally:
+            self.cleanup(user)
+            user.delete()
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"\n== {options['tokens_per_day']} sesiones/día, "
+                f"caducan a los {options['lifetime']} días =="
+            )
+        )
+        self.stdout.write(
+            f"{'día':>4} {'filas':>9} {'p50 µs':>8} {'p95 µs':>8}"
+            f" | {'filas':>9} {'p50 µs':>8} {'p95 µs':>8} {'purga ms':>9}"
+        )
+        for day, (plain, purged) in enumerate(zip(without, with_purge), 1):
+            self.stdout.write(
+                f"{day:>4} {plain['rows']:>9} {plain['p50']:>8.1f} "
+                f"{plain['p95']:>8.1f} | {purged['rows']:>9} {purged['p50']:>8.1f} "
+                f"{purged['p95']:>8.1f} {purged['purge'] * 1000:>9.1f}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Izquierda: sin purga. Derecha: con purga (lote más lento en ms)."
+            )
+        )
+
+    def run_phase(self, user, options, purge):
+        self.cleanup(user)
+        rng = random.Random(42)
+        # Reloj simulado: el día d empieza en start + d días
+        start = timezone.now() - datetime.timedelta(days=options["days"])
+        lifetime = datetime.timedelta(days=options["lifetime"])
+        results = []
+        for day in range(options["days"]):
+            now = start + datetime.timedelta(days=day)
+            live = self.seed_day(user, options["tokens_per_day"], now + lifetime)
+
+            slowest = 0.0
+            if purge:
+                for model in (AuthToken, BlacklistedToken):
+                    _, _, batch = purge_queryset(
+                        model.objects.filter(
+                            expires_at__lte=now, **self.bench_filter(model, user)
+                        ),
+                        batch_size=options["batch_size"],
+                        pause=0,
+                    )
+                    slowest = max(slowest, batch)
+
+            timings = self.measure(rng.sample(live, min(options["lookups"], len(live))))
+            timings.sort()
+            results.append(
+                {
+                    "rows": AuthToken.objects.filter(user=user).count()
+                    + BlacklistedToken.objects.filter(
+                        token__startswith=BENCH_PREFIX
+                    ).count(),
+                    "p50": statistics.median(timings),
+                    "p95": timings[int(len(timings) * 0.95) - 1],
+                    "purge": slowest,
+                }
+            )
+        return results
+
+    def seed_day(self, user, count, expires_at):
+        """Un día de tráfico: cada sesión deja un AuthToken y un token revocado."""
+        tokens = []
+        with transaction.atomic():
+            sessions = [
+                AuthToken(
+                    user=user,
+                    access_token=BENCH_PREFIX + secrets.token_urlsafe(96),
+                    refresh_token=BENCH_PREFIX + secrets.token_urlsafe(24),
+                    expires_at=expires_at,
+                )
+                for _ in range(count)
+            ]
+            # bulk_create no pasa por save(): rellenar los digest aquí
+            for session in sessions:
+                session.set_digests()
+            AuthToken.objects.bulk_create(sessions, batch_size=5000)
+            revoked = [
+                BlacklistedToken(
+                    token=BENCH_PREFIX + secrets.token_urlsafe(24),
+                    expires_at=expires_at,
+                )
+                for _ in range(count)
+            ]
+            for blacklisted in revoked:
+                blacklisted.set_digests()
+            BlacklistedToken.objects.bulk_create(revoked, batch_size=5000)
+        for session, blacklisted in zip(sessions, revoked):
+            tokens.append((session.refresh_token, blacklisted.token))
+        return tokens
+
+    def measure(self, tokens):
+        # Las mismas consultas que el refresco y la confirmación de revocación
+        timings = []
+        for refresh_token, revoked in tokens:
+            started = time.perf_counter()
+            AuthToken.get_by_refresh_token(refresh_token)
+            BlacklistedToken.objects.filter(token_lookup("token", revoked)).exists()
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        return timings
+
+    def bench_filter(self, model, user):
+        if model is AuthToken:
+            return {"user": user}
+        return {"token__startswith": BENCH_PREFIX}
+
+    def cleanup(self, user):
+        for model in (AuthToken, BlacklistedToken):
+            purge_queryset(
+                model.objects.filter(**self.bench_filter(model, user)),
+                batch_size=10_000,
+                pause=0,
+            )
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.authentication import purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra por lotes los tokens caducados (AuthToken, BlacklistedToken, "
+        "RefreshTokenFamily, PasswordResetToken), las verificaciones de correo "
+        "ya usadas y los correos enviados de EmailOutbox, con transacciones "
+        "cortas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=purge.BATCH_SIZE)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=purge.PAUSE,
+            help="Segundos de espera entre lotes",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo contar las filas que se borrarían",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Repetir la purga cada --interval segundos",
+        )
+        parser.add_argument("--interval", type=float, default=3600.0)
+
+    def handle(self, *args, **options):
+        while True:
+            self.run(options)
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def run(self, options):
+        started = time.perf_counter()
+        stats = purge.purge_expired(
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            dry_run=options["dry_run"],
+        )
+        verb = "se borrarían" if options["dry_run"] else "borradas"
+        for name, row in stats.items():
+            line = f"{name}: {row['deleted']} filas {verb}"
+            if row["batches"]:
+                line += (
+                    f" en {row['batches']} lotes, lote más lento "
+                    f"{row['slowest_batch'] * 1000:.1f} ms"
+                )
+            self.stdout.write(f"{line} ({row['elapsed']:.2f} s)")
+
+        total = sum(row["deleted"] for row in stats.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Total: {total} filas {verb} en "
+                f"{time.perf_counter() - started:.1f} s"
+            )
+        )
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.authentication import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos pendientes de EmailOutbox por lotes, con varios "
+        "hilos que reutilizan su conexión SMTP y reintentos con espera "
+        "exponencial."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=outbox.BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=outbox.WORKERS)
+        parser.add_argument("--max-attempts", type=int, default=outbox.MAX_ATTEMPTS)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Seguir esperando correos nuevos en lugar de terminar",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Segundos de espera con la cola vacía (con --loop)",
+        )
+
+    def handle(self, *args, **options):
+        totals = {"claimed": 0, "sent": 0, "retried": 0, "failed": 0}
+        started = time.perf_counter()
+        while True:
+            stats = outbox.deliver_batch(
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                max_attempts=options["max_attempts"],
+            )
+            for key, value in stats.items():
+                totals[key] += value
+            if stats["claimed"]:
+                self.stdout.write(
+                    f"{stats['sent']} enviados, {stats['retried']} reintentos, "
+                    f"{stats['failed']} fallidos"
+                )
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Total: {totals['sent']} enviados, {totals['retried']} reintentos, "
+                f"{totals['failed']} fallidos en {elapsed:.1f} s"
+            )
+        )
@@ -1,17 +1,47 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 import datetime
 import uuid
 
+from apps.authentication.cache import token_cache, token_digest
+from apps.authentication.revocation import revocation_index
+
+
+def token_lookup(field, token):
+    """
+    Busca el token por su digest o, en filas aún sin digest (anteriores a
+    backfill_token_digests), por el texto completo.
+    """
+    return models.Q(**{f"{field}_digest": token_digest(token)}) | models.Q(
+        **{f"{field}_digest__isnull": True, field: token}
+    )
+
 
 class AuthToken(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    access_token = models.TextField(unique=True)
-    refresh_token = models.TextField(unique=True)
-    expires_at = models.DateTimeField()
+    access_token = models.TextField()
+    refresh_token = models.TextField()
+    # SHA-256 de cada token: las búsquedas usan este índice estrecho y no el
+    # texto completo del JWT. Nulos solo hasta ejecutar backfill_token_digests.
+    access_token_digest = models.CharField(
+        max_length=64, unique=True, null=True, editable=False
+    )
+    refresh_token_digest = models.CharField(
+        max_length=64, unique=True, null=True, editable=False
+    )
+    expires_at = models.DateTimeField(db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        self.set_digests()
+        super().save(*args, **kwargs)
+
+    def set_digests(self):
+        self.access_token_digest = token_digest(self.access_token)
+        self.refresh_token_digest = token_digest(self.refresh_token)
+
     def is_valid(self):
         return timezone.now() < self.expires_at
 
@@ -19,38 +49,221 @@ class AuthToken(models.Model):
     def get_active_token(cls, user):
         return cls.objects.filter(user=user, expires_at__gt=timezone.now()).first()
 
+    @classmethod
+    def get_by_access_token(cls, token, **filters):
+        return cls.objects.filter(
+            token_lookup("access_token", token), **filters
+        ).first()
+
+    @classmethod
+    def get_by_refresh_token(cls, token, **filters):
+        return cls.objects.filter(
+            token_lookup("refresh_token", token), **filters
+        ).first()
+
     def revoke(self):
         BlacklistedToken.objects.create(
             token=self.refresh_token, expires_at=self.expires_at
         )
+        revocation_index.add(self.refresh_token)
+        token_cache.invalidate_token(self.access_token)
         self.delete()
 
 
 class BlacklistedToken(models.Model):
-    token = models.TextField(unique=True)
-    expires_at = models.DateTimeField()
+    token = models.TextField()
+    token_digest = models.CharField(
+        max_length=64, unique=True, null=True, editable=False
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    def save(self, *args, **kwargs):
+        self.set_digests()
+        super().save(*args, **kwargs)
+
+    def set_digests(self):
+        self.token_digest = token_digest(self.token)
 
     @classmethod
     def is_blacklisted(cls, token):
-        return cls.objects.filter(token=token, expires_at__gt=timezone.now()).exists()
+        # La consulta solo se hace cuando el filtro de Bloom da un "quizá"
+        if not revocation_index.might_contain(token):
+            return False
+        return cls.objects.filter(
+            token_lookup("token", token), expires_at__gt=timezone.now()
+        ).exists()
+
+
+class RefreshTokenFamily(models.Model):
+    """
+    Cadena de refresh tokens nacida de un login.
+
+    Los refresh tokens son JWT firmados con el id de la familia y su
+    generación; cada rotación sube la generación con un UPDATE condicional.
+    Presentar un token de una generación anterior delata su reutilización
+    y revoca la familia entera.
+
+    Una fila por usuario: cada login la reutiliza con un id nuevo, de modo
+    que los tokens de la sesión anterior dejan de casar con ninguna fila.
+    """
+
+    LIFETIME = datetime.timedelta(days=7)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    generation = models.PositiveIntegerField(default=0)
+    # Se renueva en cada rotación: caduca tras LIFETIME sin refrescar
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def cache_key(family_id):
+        return f"auth:family:{family_id}"
+
+    @classmethod
+    def start(cls, user):
+        """
+        Sustituye la familia del usuario por una nueva con un único UPDATE
+        (o un INSERT en su primer login), como AuthToken.start_session antes,
+        y borra las sesiones de AuthToken anteriores a las familias.
+        """
+        now = timezone.now()
+        family = cls(
+            id=uuid.uuid4(), user=user, expires_at=now + cls.LIFETIME, created_at=now
+        )
+        with transaction.atomic():
+            # La escritura va primero: en SQLite toma el bloqueo de escritura
+            # sin pasar antes por uno de lectura
+            if not cls.replace(family):
+                try:
+                    with transaction.atomic():
+                        family.save(force_insert=True)
+                except IntegrityError:
+                    # Primer login simultáneo: la otra petición ya insertó la fila
+                    cls.replace(family)
+            AuthToken.objects.filter(user=user).delete()
+        cache.set(cls.cache_key(family.pk), (0, False), cls.LIFETIME.total_seconds())
+        token_cache.invalidate_user(user.pk)
+        return family
+
+    @classmethod
+    def replace(cls, family):
+        # El id cambia: rotate() de un token anterior no encuentra la fila
+        return cls.objects.filter(user=family.user).update(
+            id=family.pk,
+            generation=0,
+            expires_at=family.expires_at,
+            revoked_at=None,
+            created_at=family.created_at,
+        )
+
+    @classmethod
+    def rotate(cls, family_id, user_id, generation):
+        """
+        Avanza la familia si `generation` es la vigente y devuelve la familia
+        con la generación nueva (sin releerla). Si no, devuelve None y, si el
+        token ya se había usado, revoca la familia.
+        """
+        key = cls.cache_key(family_id)
+        state = cache.get(key)
+        if state is not None:
+            current, revoked = state
+            # Estado ya conocido: rechazar sin tocar la BD
+            if revoked:
+                return None
+            if current > generation:
+                cls.revoke_family(family_id)
+                return None
+
+        now = timezone.now()
+        family = cls(
+            pk=family_id,
+            user_id=user_id,
+            generation=generation + 1,
+            expires_at=now + cls.LIFETIME,
+        )
+        updated = cls.objects.filter(
+            pk=family_id,
+            user_id=user_id,
+            generation=generation,
+            revoked_at__isnull=True,
+            expires_at__gt=now,
+        ).update(generation=family.generation, expires_at=family.expires_at)
+        if updated:
+            cache.set(key, (family.generation, False), cls.LIFETIME.total_seconds())
+            return family
+
+        current = (
+            cls.objects.filter(pk=family_id, revoked_at__isnull=True)
+            .values_list("generation", flat=True)
+            .first()
+        )
+        if current is not None and current > generation:
+            cls.revoke_family(family_id)
+        return None
+
+    @classmethod
+    def revoke_family(cls, family_id):
+        cls.objects.filter(pk=family_id, revoked_at__isnull=True).update(
+            revoked_at=timezone.now()
+        )
+        cache.set(cls.cache_key(family_id), (None, True), cls.LIFETIME.total_seconds())
 
 
 class EmailVerification(models.Model):
+    # Token válido 24 horas
+    VALIDITY = datetime.timedelta(days=1)
+
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     token = models.CharField(max_length=255, default=uuid.uuid4)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     is_verified = models.BooleanField(default=False)
 
     def is_valid(self):
-        # Token válido 24 horas
-        return (timezone.now() - self.created_at).days < 1
+        return timezone.now() - self.created_at < self.VALIDITY
 
 
 class PasswordResetToken(models.Model):
+    VALIDITY = datetime.timedelta(hours=24)
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     token = models.CharField(max_length=255, default=uuid.uuid4)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def is_valid(self):
+        return timezone.now() - self.created_at < self.VALIDITY
+
+
+class EmailOutbox(models.Model):
+    """Correo pendiente de envío; lo entrega el comando send_queued_emails."""
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pendiente"),
+        (SENT, "Enviado"),
+        (FAILED, "Fallido"),
+    )
+
+    template = models.CharField(max_length=50)
+    context = models.JSONField(default=dict)
+    to_email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Próximo intento; al reclamar un correo se adelanta como plazo de envío
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"], name="outbox_status_next_idx"
+            ),
+        ]
 
-        return (timezone.now() - self.created_at).hours < 24
+    def __str__(self):
+        return f"{self.template} -> {self.to_email} ({self.status})"
@@ -0,0 +1,195 @@
+import datetime
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.authentication.email_templates import EMAIL_TEMPLATES, get_email_template
+from apps.authentication.models import EmailOutbox
+
+_config = getattr(settings, "EMAIL_OUTBOX", {})
+
+BATCH_SIZE = _config.get("BATCH_SIZE", 100)
+WORKERS = _config.get("WORKERS", 4)
+MAX_ATTEMPTS = _config.get("MAX_ATTEMPTS", 5)
+BACKOFF_BASE = _config.get("BACKOFF_BASE", 30)
+BACKOFF_MAX = _config.get("BACKOFF_MAX", 3600)
+LEASE = _config.get("LEASE", 300)
+
+
+def enqueue_email(template, to_email, context):
+    if template not in EMAIL_TEMPLATES:
+        raise ValueError(f"Plantilla de correo desconocida: {template}")
+    return EmailOutbox.objects.create(
+        template=template, to_email=to_email, context=context
+    )
+
+
+def enqueue_emails(template, recipients, batch_size=1000):
+    """Encola (to_email, context) en bloque, p. ej. para una campaña."""
+    if template not in EMAIL_TEMPLATES:
+        raise ValueError(f"Plantilla de correo desconocida: {template}")
+    return EmailOutbox.objects.bulk_create(
+        [
+            EmailOutbox(template=template, to_email=to_email, context=context)
+            for to_email, context in recipients
+        ],
+        batch_size=batch_size,
+    )
+
+
+def build_messages(chunk, connection=None):
+    """
+    Renderiza chunk agrupado por plantilla, en una pasada por plantilla.
+    Devuelve (mensajes, fallos) con mensajes como pares (outbox, mensaje).
+    """
+    messages, failed = [], []
+    by_template = {}
+    for outbox in chunk:
+        by_template.setdefault(outbox.template, []).append(outbox)
+
+    for key, group in by_template.items():
+        try:
+            template = get_email_template(key)
+        except Exception as exc:
+            failed.extend((outbox, exc) for outbox in group)
+            continue
+        try:
+            rendered = list(template.render_many(outbox.context for outbox in group))
+        except Exception:
+            # Aislar el contexto que falla y renderizar el resto uno a uno
+            rendered = []
+            for outbox in list(group):
+                try:
+                    rendered.append(template.render(outbox.context))
+                except Exception as exc:
+                    failed.append((outbox, exc))
+                    group.remove(outbox)
+        for outbox, (html_message, text_message) in zip(group, rendered):
+            message = EmailMultiAlternatives(
+                subject=template.subject,
+                body=text_message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[outbox.to_email],
+                connection=connection,
+            )
+            message.attach_alternative(html_message, "text/html")
+            messages.append((outbox, message))
+    return messages, failed
+
+
+def backoff_delay(attempts):
+    """Espera exponencial con jitter antes del siguiente intento."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """
+    Reserva hasta batch_size correos vencidos adelantando next_attempt_at
+    LEASE segundos: si el worker muere, vuelven a estar disponibles.
+
+    Con SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL) cada worker se salta
+    las filas que reservan los demás. Sin él (SQLite lo ignora) cada fila se
+    reclama con un UPDATE condicional a que siga vencida: la fila que otro
+    worker ya reservó no cambia y no entra en el lote.
+    """
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(
+        status=EmailOutbox.PENDING, next_attempt_at__lte=now
+    )
+    lease = {
+        "attempts": F("attempts") + 1,
+        "next_attempt_at": now + datetime.timedelta(seconds=LEASE),
+    }
+    if transaction.get_connection().features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                due.order_by("next_attempt_at")
+                .select_for_update(skip_locked=True)
+                .values_list("id", flat=True)[:batch_size]
+            )
+            EmailOutbox.objects.filter(id__in=ids).update(**lease)
+    else:
+        candidates = list(
+            due.order_by("next_attempt_at").values_list("id", flat=True)[:batch_size]
+        )
+        ids = []
+        # Sin lecturas previas en la transacción: en SQLite el primer UPDATE
+        # toma el bloqueo de escritura (o espera) en lugar de fallar con
+        # "database is locked" al pasar de lectura a escritura
+        with transaction.atomic():
+            for pk in candidates:
+                if due.filter(pk=pk).update(**lease):
+                    ids.append(pk)
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by("id"))
+
+
+def send_chunk(chunk):
+    """Envía chunk por una única conexión; devuelve (enviados, fallos)."""
+    sent = []
+    connection = get_connection()
+    messages, failed = build_messages(chunk, connection)
+    try:
+        connection.open()
+        for outbox, message in messages:
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                failed.append((outbox, exc))
+            else:
+                sent.append(outbox)
+    except Exception as exc:
+        # Sin conexión: el resto del lote se reintenta más tarde
+        done = {outbox.pk for outbox in sent} | {outbox.pk for outbox, _ in failed}
+        failed.extend((outbox, exc) for outbox in chunk if outbox.pk not in done)
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return sent, failed
+
+
+def deliver_batch(batch_size=BATCH_SIZE, workers=WORKERS, max_attempts=MAX_ATTEMPTS):
+    """
+    Reclama y envía un lote repartido entre `workers` hilos, cada uno con su
+    propia conexión SMTP. Devuelve las métricas del lote.
+    """
+    batch = claim_batch(batch_size)
+    stats = {"claimed": len(batch), "sent": 0, "retried": 0, "failed": 0}
+    if not batch:
+        return stats
+
+    workers = max(1, min(workers, len(batch)))
+    chunks = [batch[index::workers] for index in range(workers)]
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(send_chunk, chunks))
+
+    now = timezone.now()
+    sent_ids = [outbox.pk for sent, _ in results for outbox in sent]
+    EmailOutbox.objects.filter(id__in=sent_ids).update(
+        status=EmailOutbox.SENT, sent_at=now, last_error=""
+    )
+    stats["sent"] = len(sent_ids)
+
+    failures = [failure for _, failed in results for failure in failed]
+    for outbox, exc in failures:
+        outbox.last_error = f"{type(exc).__name__}: {exc}"
+        if outbox.attempts >= max_attempts:
+            outbox.status = EmailOutbox.FAILED
+            stats["failed"] += 1
+        else:
+            outbox.next_attempt_at = now + datetime.timedelta(
+                seconds=backoff_delay(outbox.attempts)
+            )
+            stats["retried"] += 1
+    EmailOutbox.objects.bulk_update(
+        [outbox for outbox, _ in failures],
+        ["status", "last_error", "next_attempt_at"],
+    )
+    return stats
@@ -0,0 +1,95 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.authentication.models import (
+    AuthToken,
+    BlacklistedToken,
+    EmailOutbox,
+    EmailVerification,
+    PasswordResetToken,
+    RefreshTokenFamily,
+)
+
+_config = getattr(settings, "TOKEN_PURGE", {})
+
+BATCH_SIZE = _config.get("BATCH_SIZE", 1000)
+# Pausa entre lotes para ceder la BD al tráfico normal
+PAUSE = _config.get("PAUSE", 0.0)
+# Días que se conservan los correos ya enviados de EmailOutbox
+OUTBOX_RETENTION_DAYS = _config.get("OUTBOX_RETENTION_DAYS", 7)
+
+
+def expired_querysets(now=None):
+    """Filas caducadas por tabla; cada filtro usa un índice de fecha."""
+    now = now or timezone.now()
+    return {
+        "AuthToken": AuthToken.objects.filter(expires_at__lte=now),
+        # Un token revocado que ya expiró se rechazaría igualmente
+        "BlacklistedToken": BlacklistedToken.objects.filter(expires_at__lte=now),
+        # Las pendientes se conservan: la acción de reenvío renueva su token
+        # Las revocadas también caducan: hasta entonces delatan reutilizaciones
+        "RefreshTokenFamily": RefreshTokenFamily.objects.filter(expires_at__lte=now),
+        "EmailVerification": EmailVerification.objects.filter(
+            is_verified=True, created_at__lte=now - EmailVerification.VALIDITY
+        ),
+        "PasswordResetToken": PasswordResetToken.objects.filter(
+            created_at__lte=now - PasswordResetToken.VALIDITY
+        ),
+        "EmailOutbox": EmailOutbox.objects.filter(
+            status=EmailOutbox.SENT,
+            sent_at__lte=now - datetime.timedelta(days=OUTBOX_RETENTION_DAYS),
+        ),
+    }
+
+
+def purge_queryset(queryset, batch_size=BATCH_SIZE, pause=PAUSE):
+    """
+    Borra las filas de queryset en lotes de batch_size ids, cada uno en su
+    propia transacción corta, para no bloquear la tabla durante la purga.
+    Devuelve (filas borradas, lotes, segundos del lote más lento).
+    """
+    deleted = batches = 0
+    slowest = 0.0
+    model = queryset.model
+    while True:
+        started = time.perf_counter()
+        with transaction.atomic():
+            ids = list(
+                queryset.order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            count, _ = model.objects.filter(pk__in=ids).delete()
+        slowest = max(slowest, time.perf_counter() - started)
+        deleted += count
+        batches += 1
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted, batches, slowest
+
+
+def purge_expired(batch_size=BATCH_SIZE, pause=PAUSE, dry_run=False, now=None):
+    """
+    Purga las filas caducadas de tokens, verificaciones y correos enviados.
+    Pensada para un cron o un planificador; devuelve métricas por tabla.
+    """
+    stats = {}
+    for name, queryset in expired_querysets(now).items():
+        started = time.perf_counter()
+        if dry_run:
+            deleted, batches, slowest = queryset.count(), 0, 0.0
+        else:
+            deleted, batches, slowest = purge_queryset(queryset, batch_size, pause)
+        stats[name] = {
+            "deleted": deleted,
+            "batches": batches,
+            "slowest_batch": slowest,
+            "elapsed": time.perf_counter() - started,
+        }
+    return stats
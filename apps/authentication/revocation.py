@@ -0,0 +1,116 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+
+from apps.authentication.cache import token_digest
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest):
+        # Doble hashing sobre el SHA-256 ya calculado del token
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, digest, new=True):
+        for pos in self._positions(digest):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        if new:
+            self.count += 1
+
+    def __contains__(self, digest):
+        for pos in self._positions(digest):
+            if not self._bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class RevocationIndex:
+    """
+    Índice en memoria de tokens revocados, cargado una vez por worker.
+
+    Un resultado negativo es definitivo; uno positivo ("quizá") debe
+    confirmarse contra la base de datos. Las filas nuevas se incorporan
+    de forma incremental usando el mayor id visto como marca de agua.
+    """
+
+    def __init__(
+        self, capacity=100000, error_rate=0.001, refresh_interval=1.0, lookback=100
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.lookback = lookback
+        self._bloom = None
+        self._high_water = 0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def might_contain(self, token):
+        self._maybe_refresh()
+        return token_digest(token) in self._bloom
+
+    def add(self, token):
+        self._maybe_refresh()
+        with self._lock:
+            self._bloom.add(token_digest(token), new=False)
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._high_water = 0
+            self._refreshed_at = 0.0
+
+    def _maybe_refresh(self):
+        if (
+            self._bloom is not None
+            and time.monotonic() - self._refreshed_at < self.refresh_interval
+        ):
+            return
+        with self._lock:
+            if self._bloom is None:
+                self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._load()
+            if self._bloom.count > self._bloom.capacity:
+                # Demasiados elementos: la tasa de falsos positivos se dispara
+                self.capacity = self._bloom.count * 2
+                self._bloom = BloomFilter(self.capacity, self.error_rate)
+                self._high_water = 0
+                self._load()
+            self._refreshed_at = time.monotonic()
+
+    def _load(self):
+        from apps.authentication.models import BlacklistedToken
+
+        # Se relee una pequeña ventana por debajo de la marca de agua para no
+        # perder filas de transacciones que confirmaron fuera de orden.
+        high_water = self._high_water
+        rows = (
+            BlacklistedToken.objects.filter(id__gt=max(0, high_water - self.lookback))
+            .order_by("id")
+            .values_list("id", "token_digest", "token")
+        )
+        for pk, digest, token in rows.iterator(chunk_size=5000):
+            self._bloom.add(digest or token_digest(token), new=pk > high_water)
+            self._high_water = max(self._high_water, pk)
+
+
+_config = getattr(settings, "JWT_REVOCATION_INDEX", {})
+
+revocation_index = RevocationIndex(
+    capacity=_config.get("CAPACITY", 100000),
+    error_rate=_config.get("ERROR_RATE", 0.001),
+    refresh_interval=_config.get("REFRESH_INTERVAL", 1.0),
+    lookback=_config.get("LOOKBACK", 100),
+)
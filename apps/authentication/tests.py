@@ -1,3 +1,594 @@
-from django.test import TestCase
+import datetime
+import io
+import time
+import uuid
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from apps.authentication import outbox
+from apps.authentication.authentication import JWTAuthentication
+from apps.authentication.cache import TokenCache, token_cache, token_digest
+from apps.authentication.email_templates import get_email_template
+from apps.authentication.keys import decode_jwt, encode_jwt, get_jwks
+from apps.authentication.models import (
+    AuthToken,
+    BlacklistedToken,
+    EmailOutbox,
+    PasswordResetToken,
+    RefreshTokenFamily,
+)
+from apps.authentication.purge import purge_expired, purge_queryset
+from apps.authentication.revocation import RevocationIndex, revocation_index
+from apps.authentication.utils import (
+    decode_refresh_token,
+    generate_access_token,
+    queue_verification_email,
+)
+from apps.manager.models import User
+
+LOGIN_URL = "/api/auth/login/"
+REFRESH_URL = "/api/auth/refresh/"
+LOGOUT_URL = "/api/auth/logout/"
+USERS_URL = "/api/user/users/"
+
+KEYRING = {
+    "ACTIVE_KID": "2025-02",
+    "KEYS": {
+        "2025-01": {"SECRET": "enero-" + "a" * 64},
+        "2025-02": {"SECRET": "febrero-" + "b" * 64},
+    },
+    "ACCEPT_LEGACY_KID": True,
+}
+
+
+def reset_auth_state():
+    cache.clear()
+    token_cache.clear()
+    revocation_index.reset()
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        reset_auth_state()
+        self.user = User.objects.create(
+            email="ana@example.com", first_name="Ana", is_staff=True
+        )
+        self.token = generate_access_token(self.user)
+
+    def authenticate(self):
+        request = APIRequestFactory().get(
+            USERS_URL, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        return JWTAuthentication().authenticate(request)
+
+    def test_second_request_is_served_from_the_cache(self):
+        self.authenticate()
+        hits = token_cache.hits
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+
+        self.assertEqual(token_cache.hits, hits + 1)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_cached_user_keeps_each_field_in_place(self):
+        self.authenticate()
+
+        user, _ = self.authenticate()
+
+        self.assertEqual(user.email, "ana@example.com")
+        self.assertEqual(user.first_name, "Ana")
+        self.assertIs(user.is_staff, True)
+        self.assertIs(user.is_superuser, False)
+
+    def test_entries_expire_and_are_evicted(self):
+        small = TokenCache(max_size=2, ttl=60)
+        for token in ("a", "b", "c"):
+            small.set(token, {}, self.user)
+
+        self.assertIsNone(small.get("a"))
+        self.assertIsNotNone(small.get("c"))
+
+        # Nunca más allá del exp del token
+        small.set("d", {"exp": time.time() - 1}, self.user)
+        self.assertIsNone(small.get("d"))
+
+    def test_login_drops_cached_tokens_of_the_user(self):
+        self.authenticate()
+
+        RefreshTokenFamily.start(self.user)
+
+        # Sin revocaciones el filtro de Bloom evita la consulta a BlacklistedToken
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+
+class LogoutTests(APITestCase):
+    def setUp(self):
+        reset_auth_state()
+        self.user = User.objects.create(email="ana@example.com")
+        self.token = generate_access_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_logout_drops_the_cached_token(self):
+        self.client.get(USERS_URL)
+        self.assertIsNotNone(token_cache.get(self.token))
+
+        response = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(token_cache.get(self.token))
+
+
+class RevocationIndexTests(TestCase):
+    def setUp(self):
+        reset_auth_state()
+
+    def blacklist(self, pk, token):
+        return BlacklistedToken.objects.create(
+            id=pk,
+            token=token,
+            expires_at=timezone.now() + datetime.timedelta(days=1),
+        )
+
+    def test_negative_answer_is_definitive(self):
+        index = RevocationIndex(capacity=100, refresh_interval=0)
+        self.blacklist(1, "revocado")
+
+        self.assertTrue(index.might_contain("revocado"))
+        self.assertFalse(index.might_contain("vigente"))
+
+    def test_rows_committed_out_of_order_are_picked_up(self):
+        index = RevocationIndex(capacity=100, refresh_interval=0, lookback=100)
+        self.blacklist(200, "primero")
+        self.assertTrue(index.might_contain("primero"))
+
+        # Un id menor que confirma después que la marca de agua
+        self.blacklist(150, "tardío")
+
+        self.assertTrue(index.might_contain("tardío"))
+
+    def test_revoked_token_is_seen_before_the_next_refresh(self):
+        user = User.objects.create(email="ana@example.com")
+        self.assertFalse(BlacklistedToken.is_blacklisted("sin-revocar"))
+        token = AuthToken.objects.create(
+            user=user,
+            access_token=str(uuid.uuid4()),
+            refresh_token=str(uuid.uuid4()),
+            expires_at=timezone.now() + datetime.timedelta(days=1),
+        )
+
+        token.revoke()
+
+        self.assertTrue(BlacklistedToken.is_blacklisted(token.refresh_token))
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="ana@example.com")
+        self.email = queue_verification_email(self.user, "token")
+
+    def test_delivers_pending_emails(self):
+        stats = outbox.deliver_batch(workers=1)
+
+        self.assertEqual(stats["sent"], 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["ana@example.com"])
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, EmailOutbox.SENT)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        started = timezone.now()
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=SMTPException("sin servidor"),
+        ):
+            stats = outbox.deliver_batch(workers=1, max_attempts=3)
+
+        self.assertEqual(stats["retried"], 1)
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, EmailOutbox.PENDING)
+        self.assertEqual(self.email.attempts, 1)
+        self.assertIn("sin servidor", self.email.last_error)
+        self.assertGreaterEqual(
+            self.email.next_attempt_at,
+            started + datetime.timedelta(seconds=outbox.BACKOFF_BASE / 2),
+        )
+        # Aún no vence: el siguiente lote no lo reclama
+        self.assertEqual(outbox.claim_batch(), [])
+
+    def test_email_fails_after_max_attempts(self):
+        EmailOutbox.objects.filter(pk=self.email.pk).update(attempts=2)
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=SMTPException("sin servidor"),
+        ):
+            stats = outbox.deliver_batch(workers=1, max_attempts=3)
+
+        self.assertEqual(stats["failed"], 1)
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, EmailOutbox.FAILED)
+
+    def test_claimed_emails_are_leased(self):
+        self.assertEqual([email.pk for email in outbox.claim_batch()], [self.email.pk])
+        self.assertEqual(outbox.claim_batch(), [])
+
+        # Vencido el plazo (worker caído) vuelve a estar disponible
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual([email.pk for email in outbox.claim_batch()], [self.email.pk])
+
+    def test_rows_leased_by_another_worker_are_skipped(self):
+        taken = queue_verification_email(self.user, "otro")
+        atomic = transaction.atomic
+
+        def lease_after_select(*args, **kwargs):
+            # Otro worker reserva la fila entre el SELECT y el UPDATE
+            EmailOutbox.objects.filter(pk=taken.pk).update(
+                next_attempt_at=timezone.now() + datetime.timedelta(minutes=5)
+            )
+            return atomic(*args, **kwargs)
+
+        with mock.patch.object(
+            connection.features, "has_select_for_update_skip_locked", False
+        ), mock.patch(
+            "apps.authentication.outbox.transaction.atomic", lease_after_select
+        ):
+            claimed = outbox.claim_batch()
+
+        self.assertEqual([email.pk for email in claimed], [self.email.pk])
+        taken.refresh_from_db()
+        self.assertEqual(taken.attempts, 0)
+
+
+class EmailTemplateTests(TestCase):
+    def test_text_variant_is_not_escaped(self):
+        template = get_email_template("verify_email")
+        url = "https://app.example.com/verify?token=a&b=<c>"
+
+        html, text = template.render(
+            {
+                "user": {"first_name": "Ana", "email": "ana@example.com"},
+                "verification_url": url,
+            }
+        )
+
+        self.assertIn("token=a&amp;b=&lt;c&gt;", html)
+        self.assertIn(url, text)
+        self.assertNotIn("<p>", text)
+
+    def test_render_many_keeps_contexts_apart(self):
+        template = get_email_template("verify_email")
+
+        rendered = list(
+            template.render_many(
+                [
+                    {
+                        "user": {"first_name": "Ana", "email": "ana@example.com"},
+                        "verification_url": "uno",
+                    },
+                    {
+                        "user": {"first_name": "", "email": "luis@example.com"},
+                        "verification_url": "",
+                    },
+                ]
+            )
+        )
+
+        self.assertIn("Hola Ana,", rendered[0][1])
+        self.assertIn("Hola luis@example.com,", rendered[1][1])
+        self.assertNotIn("uno", rendered[1][1])
+
+
+class PurgeTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.expired = now - datetime.timedelta(days=1)
+        self.live = now + datetime.timedelta(days=1)
+        BlacklistedToken.objects.bulk_create(
+            [
+                BlacklistedToken(token=f"caducado-{index}", expires_at=self.expired)
+                for index in range(5)
+            ]
+            + [BlacklistedToken(token="vigente", expires_at=self.live)]
+        )
+
+    def test_deletes_expired_rows_in_batches(self):
+        queryset = BlacklistedToken.objects.filter(expires_at__lte=timezone.now())
+
+        deleted, batches, _ = purge_queryset(queryset, batch_size=2)
+
+        self.assertEqual((deleted, batches), (5, 3))
+        self.assertEqual(
+            list(BlacklistedToken.objects.values_list("token", flat=True)),
+            ["vigente"],
+        )
+
+    def test_dry_run_only_counts(self):
+        stats = purge_expired(dry_run=True)
+
+        self.assertEqual(stats["BlacklistedToken"]["deleted"], 5)
+        self.assertEqual(BlacklistedToken.objects.count(), 6)
+
+    def test_keeps_pending_and_recent_emails(self):
+        old = timezone.now() - datetime.timedelta(days=30)
+        EmailOutbox.objects.bulk_create(
+            [
+                EmailOutbox(
+                    to_email="a@example.com", status=EmailOutbox.SENT, sent_at=old
+                ),
+                EmailOutbox(to_email="b@example.com", status=EmailOutbox.PENDING),
+                EmailOutbox(
+                    to_email="c@example.com",
+                    status=EmailOutbox.SENT,
+                    sent_at=timezone.now(),
+                ),
+            ]
+        )
+
+        stats = purge_expired()
+
+        self.assertEqual(stats["EmailOutbox"]["deleted"], 1)
+        self.assertEqual(
+            sorted(EmailOutbox.objects.values_list("to_email", flat=True)),
+            ["b@example.com", "c@example.com"],
+        )
+
+    def test_reset_tokens_expire_after_their_validity(self):
+        user = User.objects.create(email="ana@example.com")
+        token = PasswordResetToken.objects.create(user=user, token="reset")
+        self.assertTrue(token.is_valid())
+
+        token.created_at = timezone.now() - PasswordResetToken.VALIDITY
+        self.assertFalse(token.is_valid())
+
+
+class TokenDigestTests(TestCase):
+    def setUp(self):
+        reset_auth_state()
+        self.user = User.objects.create(email="ana@example.com")
+        self.session = AuthToken.objects.create(
+            user=self.user,
+            access_token="acceso",
+            refresh_token="refresco",
+            expires_at=timezone.now() + datetime.timedelta(days=1),
+        )
+
+    def test_lookups_use_the_digest(self):
+        self.assertEqual(self.session.refresh_token_digest, token_digest("refresco"))
+        self.assertEqual(AuthToken.get_by_refresh_token("refresco"), self.session)
+        self.assertEqual(
+            AuthToken.get_by_access_token("acceso", user=self.user), self.session
+        )
+        self.assertIsNone(AuthToken.get_by_refresh_token("acceso"))
+
+        self.session.revoke()
+        self.assertTrue(BlacklistedToken.is_blacklisted("refresco"))
+
+    def test_backfill_fills_missing_digests(self):
+        AuthToken.objects.update(access_token_digest=None, refresh_token_digest=None)
+        BlacklistedToken.objects.create(
+            token="revocado", expires_at=self.session.expires_at
+        )
+        BlacklistedToken.objects.update(token_digest=None)
+
+        call_command("backfill_token_digests", batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(
+            AuthToken.objects.get().refresh_token_digest, token_digest("refresco")
+        )
+        self.assertEqual(
+            BlacklistedToken.objects.get().token_digest, token_digest("revocado")
+        )
+
+    def test_rows_without_digest_are_found_by_token(self):
+        AuthToken.objects.update(access_token_digest=None, refresh_token_digest=None)
+
+        self.assertEqual(AuthToken.get_by_refresh_token("refresco"), self.session)
+        self.assertEqual(
+            AuthToken.get_by_access_token("acceso", user=self.user), self.session
+        )
+        self.assertIsNone(AuthToken.get_by_refresh_token("acceso"))
+
+        self.session.revoke()
+        BlacklistedToken.objects.update(token_digest=None)
+        self.assertTrue(BlacklistedToken.is_blacklisted("refresco"))
+
+
+class LoginTests(APITestCase):
+    def setUp(self):
+        reset_auth_state()
+        self.user = User.objects.create(email="ana@example.com")
+
+    def login(self):
+        return self.client.post(
+            LOGIN_URL,
+            {"email": "ana@example.com", "password": "secreta-123"},
+            format="json",
+        )
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_hasher_reads_its_iterations_from_settings(self):
+        self.user.set_password("secreta-123")
+        self.assertEqual(self.user.password.split("$")[:2], ["pbkdf2_sha256", "1000"])
+
+    def test_login_upgrades_hashes_with_other_iterations(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.user.set_password("secreta-123")
+            self.user.save()
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=1200):
+            response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password.split("$")[1], "1200")
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class RefreshTokenFamilyTests(APITestCase):
+    def setUp(self):
+        reset_auth_state()
+        self.user = User.objects.create_user(
+            email="ana@example.com", password="secreta-123"
+        )
+
+    def login(self):
+        response = self.client.post(
+            LOGIN_URL,
+            {"email": "ana@example.com", "password": "secreta-123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def refresh(self, refresh_token):
+        return self.client.post(
+            REFRESH_URL, {"refresh_token": refresh_token}, format="json"
+        )
+
+    def test_refresh_rotates_the_generation(self):
+        tokens = self.login()
+
+        response = self.refresh(tokens["refresh_token"])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(decode_refresh_token(response.data["refresh_token"])["gen"], 1)
+        self.assertEqual(RefreshTokenFamily.objects.get(user=self.user).generation, 1)
+
+    def test_reused_refresh_token_revokes_the_family(self):
+        first = self.login()["refresh_token"]
+        second = self.refresh(first).data["refresh_token"]
+
+        self.assertEqual(self.refresh(first).status_code, status.HTTP_401_UNAUTHORIZED)
+        # La familia entera queda revocada, también la generación vigente
+        self.assertEqual(self.refresh(second).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNotNone(RefreshTokenFamily.objects.get(user=self.user).revoked_at)
+
+    def test_reuse_is_detected_without_the_cache(self):
+        first = self.login()["refresh_token"]
+        self.refresh(first)
+        cache.clear()
+
+        self.assertEqual(self.refresh(first).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNotNone(RefreshTokenFamily.objects.get(user=self.user).revoked_at)
+
+    def test_logout_revokes_the_family(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access_token']}")
+
+        response = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials()
+        self.assertEqual(
+            self.refresh(tokens["refresh_token"]).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_refresh_token_is_not_an_access_token(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['refresh_token']}")
+
+        response = self.client.get(USERS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_legacy_refresh_token_is_exchanged_once(self):
+        legacy = str(uuid.uuid4())
+        AuthToken.objects.create(
+            user=self.user,
+            access_token=str(uuid.uuid4()),
+            refresh_token=legacy,
+            expires_at=timezone.now() + datetime.timedelta(days=1),
+        )
+
+        response = self.refresh(legacy)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("fam", decode_refresh_token(response.data["refresh_token"]))
+        self.assertFalse(AuthToken.objects.exists())
+        self.assertEqual(self.refresh(legacy).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_replaces_the_previous_family(self):
+        old = self.login()["refresh_token"]
+        new = self.login()["refresh_token"]
+
+        self.assertEqual(RefreshTokenFamily.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.refresh(old).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh(new).status_code, status.HTTP_200_OK)
+
+    def test_login_after_revocation_starts_a_live_family(self):
+        first = self.login()["refresh_token"]
+        self.refresh(first)
+        self.refresh(first)
+
+        tokens = self.login()
+
+        self.assertEqual(
+            self.refresh(tokens["refresh_token"]).status_code, status.HTTP_200_OK
+        )
+
+
+class KeyringTests(TestCase):
+    payload = {"user_id": "1", "type": "access"}
+
+    def setUp(self):
+        reset_auth_state()
+
+    @override_settings(JWT_KEYS=KEYRING)
+    def test_tokens_carry_the_active_kid(self):
+        token = encode_jwt(self.payload)
+
+        self.assertEqual(jwt.get_unverified_header(token)["kid"], "2025-02")
+        self.assertEqual(decode_jwt(token)["user_id"], "1")
+
+    def test_retired_kid_is_rejected(self):
+        with self.settings(JWT_KEYS=KEYRING):
+            token = encode_jwt(self.payload)
+        retired = {**KEYRING, "ACTIVE_KID": "2025-01"}
+        retired["KEYS"] = {"2025-01": KEYRING["KEYS"]["2025-01"]}
+
+        with self.settings(JWT_KEYS=retired):
+            with self.assertRaises(jwt.InvalidTokenError):
+                decode_jwt(token)
+
+    @override_settings(JWT_KEYS=KEYRING)
+    def test_algorithm_comes_from_the_key_not_the_header(self):
+        secret = KEYRING["KEYS"]["2025-02"]["SECRET"]
+        token = jwt.encode(
+            self.payload, secret, algorithm="HS512", headers={"kid": "2025-02"}
+        )
+
+        with self.assertRaises(jwt.InvalidTokenError):
+            decode_jwt(token)
+
+    @override_settings(JWT_KEYS=KEYRING)
+    def test_kidless_tokens_follow_accept_legacy_kid(self):
+        with self.settings(JWT_KEYS={"KEYS": {}}):
+            legacy = encode_jwt(self.payload)
+        self.assertNotIn("kid", jwt.get_unverified_header(legacy))
+        self.assertEqual(decode_jwt(legacy)["user_id"], "1")
+
+        with self.settings(JWT_KEYS={**KEYRING, "ACCEPT_LEGACY_KID": False}):
+            with self.assertRaises(jwt.InvalidTokenError):
+                decode_jwt(legacy)
+
+    @override_settings(JWT_KEYS={"KEYS": {}, "ACCEPT_LEGACY_KID": False})
+    def test_active_kid_is_required_without_legacy_kid(self):
+        with self.assertRaises(ImproperlyConfigured):
+            encode_jwt(self.payload)
+
+    @override_settings(JWT_KEYS=KEYRING)
+    def test_jwks_never_publishes_hmac_keys(self):
+        self.assertEqual(get_jwks(), {"keys": []})
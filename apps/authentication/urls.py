@@ -1,5 +1,6 @@
 from django.urls import path
 from apps.authentication.views import LoginView, RefreshTokenView, LogoutView
+from apps.authentication.views import JWKSView
 from apps.authentication.views import (
     RegisterView,
     VerifyEmailView,
@@ -26,4 +27,6 @@ urlpatterns = [
         ResetPasswordView.as_view(),
         name="auth-reset-password",
     ),
+    # Claves públicas de firma (JWKS)
+    path("jwks/", JWKSView.as_view(), name="auth-jwks"),
 ]
@@ -3,55 +3,111 @@ import uuid
 from django.conf import settings
 from django.utils.timezone import now, timedelta
 
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from apps.authentication.keys import decode_jwt, encode_jwt
+from apps.authentication.models import EmailVerification
+from apps.authentication.outbox import enqueue_email, enqueue_emails
 
 
-def generate_access_token(user):
+def generate_access_token(user, family=None):
+    return encode_access_token(user.id, family.pk if family is not None else None)
+
+
+def encode_access_token(user_id, family_id=None):
     payload = {
-        "user_id": str(user.id),
+        "type": "access",
+        "user_id": str(user_id),
         "exp": now() + timedelta(minutes=15),
         "iat": now(),
     }
-    return jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+    if family_id is not None:
+        # Permite cerrar la sesión revocando la familia
+        payload["fam"] = str(family_id)
+    return encode_jwt(payload)
+
 
+def generate_refresh_token(family):
+    """Refresh token firmado y autodescriptivo: familia y generación."""
+    payload = {
+        "type": "refresh",
+        "user_id": str(family.user_id),
+        "fam": str(family.pk),
+        "gen": family.generation,
+        "exp": family.expires_at,
+        "iat": now(),
+    }
+    return encode_jwt(payload)
 
-def generate_refresh_token():
-    return str(uuid.uuid4())
 
+def decode_refresh_token(token):
+    """Payload de un refresh token firmado; lanza jwt.InvalidTokenError si no lo es."""
+    payload = decode_jwt(token)
+    if payload.get("type") != "refresh":
+        raise jwt.InvalidTokenError("No es un refresh token")
+    return payload
+
+
+def is_legacy_refresh_token(token):
+    # Los refresh tokens anteriores a las familias eran UUID opacos
+    return token.count(".") != 2
+
+
+def generate_session_tokens(family):
+    # Solo usa user_id: no hace falta cargar el usuario
+    return {
+        "access_token": encode_access_token(family.user_id, family.pk),
+        "refresh_token": generate_refresh_token(family),
+    }
 
-def send_verification_email(user, token):
-    subject = "Confirma tu correo electrónico"
+
+def email_user_context(user):
+    # Solo datos serializables en JSON: el contexto se guarda en EmailOutbox
+    return {
+        "email": user.email,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+    }
+
+
+def verification_email_context(user, token):
     verification_url = f"{settings.FRONTEND_URL}/verify-email/?token={token}"
+    return {"user": email_user_context(user), "verification_url": verification_url}
+
 
-    html_message = render_to_string(
-        "emails/verify_email.html", {"user": user, "verification_url": verification_url}
+def queue_verification_email(user, token):
+    return enqueue_email(
+        "verify_email", user.email, verification_email_context(user, token)
     )
-    plain_message = strip_tags(html_message)
-
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html_message,
+
+
+def queue_verification_campaign(verifications, batch_size=1000):
+    """
+    Renueva el token de las verificaciones pendientes y encola un correo
+    por cada una. Devuelve cuántos correos se encolaron.
+    """
+    verifications = list(verifications.filter(is_verified=False).select_related("user"))
+    created_at = now()
+    for verification in verifications:
+        verification.token = str(uuid.uuid4())
+        verification.created_at = created_at
+    EmailVerification.objects.bulk_update(
+        verifications, ["token", "created_at"], batch_size=batch_size
+    )
+    enqueue_emails(
+        "verify_email",
+        (
+            (v.user.email, verification_email_context(v.user, v.token))
+            for v in verifications
+        ),
+        batch_size=batch_size,
     )
+    return len(verifications)
 
 
-def send_password_reset_email(user, token):
-    subject = "Restablece tu contraseña"
+def queue_password_reset_email(user, token):
     reset_url = f"{settings.FRONTEND_URL}/reset-password/?token={token}"
-
-    html_message = render_to_string(
-        "emails/reset_password.html", {"user": user, "reset_url": reset_url}
-    )
-    plain_message = strip_tags(html_message)
-
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html_message,
+    return enqueue_email(
+        "reset_password",
+        user.email,
+        {"user": email_user_context(user), "reset_url": reset_url},
     )
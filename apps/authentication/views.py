@@ -1,5 +1,4 @@
 import jwt
-from django.conf import settings
 from apps.manager.models import User
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -13,14 +12,21 @@ from .serializers import (
     ResetPasswordSerializer,
 )
 from .utils import (
-    generate_access_token,
-    generate_refresh_token,
-    send_verification_email,
-    send_password_reset_email,
+    decode_refresh_token,
+    generate_session_tokens,
+    is_legacy_refresh_token,
+    queue_verification_email,
+    queue_password_reset_email,
 )
-from .models import AuthToken, BlacklistedToken, EmailVerification, PasswordResetToken
-from django.utils import timezone
-from datetime import timedelta
+from .models import (
+    AuthToken,
+    BlacklistedToken,
+    EmailVerification,
+    PasswordResetToken,
+    RefreshTokenFamily,
+)
+from .cache import token_cache
+from .keys import decode_jwt, get_jwks
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -61,26 +67,10 @@ class LoginView(APIView):
         if serializer.is_valid():
             user = serializer.validated_data
 
-            # Revocar cualquier sesión activa
-            active_token = AuthToken.get_active_token(user)
-            if active_token:
-                active_token.revoke()
-
-            access_token = generate_access_token(user)
-            refresh_token = generate_refresh_token()
-            expires_at = timezone.now() + timedelta(days=7)
-
-            AuthToken.objects.create(
-                user=user,
-                access_token=access_token,
-                refresh_token=refresh_token,
-                expires_at=expires_at,
-            )
+            # Nueva familia de refresh tokens; revoca las sesiones anteriores
+            family = RefreshTokenFamily.start(user)
 
-            return Response(
-                {"access_token": access_token, "refresh_token": refresh_token},
-                status=status.HTTP_200_OK,
-            )
+            return Response(generate_session_tokens(family), status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -115,38 +105,48 @@ class RefreshTokenView(APIView):
         serializer = RefreshTokenSerializer(data=request.data)
         if serializer.is_valid():
             refresh_token = serializer.validated_data["refresh_token"]
+            if is_legacy_refresh_token(refresh_token):
+                return self.legacy_refresh(refresh_token)
 
-            if BlacklistedToken.is_blacklisted(refresh_token):
+            try:
+                payload = decode_refresh_token(refresh_token)
+            except jwt.InvalidTokenError:
                 return Response(
-                    {"error": "Refresh token revocado"},
+                    {"error": "Refresh token inválido o expirado"},
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
 
-            token_obj = AuthToken.objects.filter(refresh_token=refresh_token).first()
-            if not token_obj or not token_obj.is_valid():
+            # Sin leer filas anchas: un UPDATE condicional sobre la familia
+            family = RefreshTokenFamily.rotate(
+                payload["fam"], payload["user_id"], payload["gen"]
+            )
+            if family is None:
                 return Response(
-                    {"error": "Refresh token inválido o expirado"},
+                    {"error": "Refresh token revocado o expirado"},
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
 
-            new_access_token = generate_access_token(token_obj.user)
-            new_refresh_token = generate_refresh_token()
-            new_expires_at = timezone.now() + timedelta(days=7)
-
-            # Revocar el antiguo token y crear uno nuevo
-            token_obj.revoke()
-            AuthToken.objects.create(
-                user=token_obj.user,
-                access_token=new_access_token,
-                refresh_token=new_refresh_token,
-                expires_at=new_expires_at,
+            return Response(generate_session_tokens(family), status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def legacy_refresh(self, refresh_token):
+        """Refresh token opaco de AuthToken: se canjea por una familia nueva."""
+        if BlacklistedToken.is_blacklisted(refresh_token):
+            return Response(
+                {"error": "Refresh token revocado"},
+                status=status.HTTP_401_UNAUTHORIZED,
             )
 
+        token_obj = AuthToken.get_by_refresh_token(refresh_token)
+        if not token_obj or not token_obj.is_valid():
             return Response(
-                {"access_token": new_access_token, "refresh_token": new_refresh_token},
-                status=status.HTTP_200_OK,
+                {"error": "Refresh token inválido o expirado"},
+                status=status.HTTP_401_UNAUTHORIZED,
             )
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        token_obj.revoke()
+        family = RefreshTokenFamily.start(token_obj.user)
+        return Response(generate_session_tokens(family), status=status.HTTP_200_OK)
 
 
 logout_responses = {
@@ -170,12 +170,16 @@ class LogoutView(APIView):
 
         token = auth_header.split(" ")[1]
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+            payload = decode_jwt(token)
             user = User.objects.get(id=payload["user_id"])
 
-            token_obj = AuthToken.objects.filter(access_token=token, user=user).first()
-            if token_obj:
-                token_obj.revoke()
+            if "fam" in payload:
+                RefreshTokenFamily.revoke_family(payload["fam"])
+            else:
+                token_obj = AuthToken.get_by_access_token(token, user=user)
+                if token_obj:
+                    token_obj.revoke()
+            token_cache.invalidate_token(token)
 
             return Response(
                 {"detail": "Sesión cerrada exitosamente."}, status=status.HTTP_200_OK
@@ -217,7 +221,7 @@ class RegisterView(APIView):
             user = serializer.save()
 
             verification, created = EmailVerification.objects.get_or_create(user=user)
-            send_verification_email(user, verification.token)
+            queue_verification_email(user, verification.token)
 
             return Response(
                 {"detail": "Registro exitoso. Revisa tu correo."},
@@ -297,7 +301,11 @@ class ForgotPasswordView(APIView):
                 reset_token, created = PasswordResetToken.objects.get_or_create(
                     user=user
                 )
-                send_password_reset_email(user, reset_token.token)
+                if not reset_token.is_valid():
+                    # No reenviar un enlace caducado
+                    reset_token.delete()
+                    reset_token = PasswordResetToken.objects.create(user=user)
+                queue_password_reset_email(user, reset_token.token)
                 return Response(
                     {"detail": "Se ha enviado un enlace a tu correo."},
                     status=status.HTTP_200_OK,
@@ -353,3 +361,22 @@ class ResetPasswordView(APIView):
                 status=status.HTTP_200_OK,
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+jwks_responses = {
+    200: openapi.Response("Claves públicas de firma de los JWT (JWKS)"),
+}
+
+
+@swagger_auto_schema(
+    operation_description="Claves públicas para verificar los JWT en otros servicios",
+    responses=jwks_responses,
+)
+class JWKSView(APIView):
+    authentication_classes = []
+
+    def get(self, request):
+        response = Response(get_jwks(), status=status.HTTP_200_OK)
+        # Las claves retiradas siguen publicadas mientras estén en JWT_KEYS
+        response["Cache-Control"] = "public, max-age=300"
+        return response
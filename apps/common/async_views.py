@@ -0,0 +1,53 @@
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from apps.authentication.authentication import JWTAuthentication
+from apps.common.renderers import ORJSONRenderer
+
+
+class AsyncAPIView(View):
+    """
+    Vista async de Django con la autenticación, los errores y el JSON del API.
+
+    DRF no ejecuta vistas async, así que esta base cubre lo que necesitan las
+    lecturas: JWTAuthentication.aauthenticate(), usuario autenticado
+    obligatorio y respuestas con el mismo formato que las vistas de DRF.
+    """
+
+    http_method_names = ["get", "options"]
+    authentication_class = JWTAuthentication
+    renderer_class = ORJSONRenderer
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Request de DRF: query_params, build_absolute_uri(), user...
+        request = self.request = Request(request)
+        try:
+            await self.authenticate(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    async def authenticate(self, request):
+        result = await self.authentication_class().aauthenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+        request.user, request.auth = result
+
+    def handle_exception(self, exc):
+        response = exception_handler(exc, {"view": self, "request": self.request})
+        if response is None:
+            raise exc
+        # Como DRF cuando la autenticación no define authenticate_header()
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            response.status_code = status.HTTP_403_FORBIDDEN
+        return self.render(response.data, status=response.status_code)
+
+    def render(self, data, status=status.HTTP_200_OK):
+        renderer = self.renderer_class()
+        return HttpResponse(
+            renderer.render(data), status=status, content_type=renderer.media_type
+        )
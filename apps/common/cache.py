@@ -0,0 +1,77 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.common.renderers import ORJSONRenderer
+
+GENERATION_KEY = "{namespace}:gen:{owner}"
+RESPONSE_KEY = "{namespace}:resp:{owner}:{generation}:{digest}"
+
+
+def get_generation(namespace, owner):
+    key = GENERATION_KEY.format(namespace=namespace, owner=owner)
+    generation = cache.get(key)
+    if generation is None:
+        # Arrancar en un valor nuevo: si la clave fue desalojada, las
+        # respuestas guardadas con la generación anterior quedan huérfanas.
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(namespace, owner):
+    """Invalida en O(1) todas las respuestas guardadas de un propietario."""
+    key = GENERATION_KEY.format(namespace=namespace, owner=owner)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_owners(namespace, owners):
+    """
+    Invalida las respuestas de owners al confirmar la transacción en curso
+    (al momento fuera de una). Antes de confirmar, una lectura concurrente
+    aún ve los datos anteriores y los guardaría con la generación nueva.
+    """
+    # "all" agrupa las vistas globales (p. ej. de administradores)
+    owners = {*owners, "all"}
+
+    def bump():
+        for owner in owners:
+            bump_generation(namespace, owner)
+
+    transaction.on_commit(bump)
+
+
+def request_fingerprint(request, *extra):
+    # Parámetros normalizados: orden estable y sin valores vacíos
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if value != ""
+    )
+    raw = repr((request.path, request.accepted_media_type, params, *extra))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def response_cache_key(namespace, owner, request, action):
+    return RESPONSE_KEY.format(
+        namespace=namespace,
+        owner=owner,
+        generation=get_generation(namespace, owner),
+        digest=request_fingerprint(request, action),
+    )
+
+
+def compute_etag(data):
+    return '"{}"'.format(hashlib.md5(ORJSONRenderer().render(data)).hexdigest())
+
+
+def weak_etag(*parts):
+    """ETag débil a partir de valores que identifican una versión del recurso."""
+    raw = repr(parts).encode("utf-8")
+    return 'W/"{}"'.format(hashlib.md5(raw).hexdigest())
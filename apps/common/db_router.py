@@ -0,0 +1,58 @@
+import contextvars
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+REPLICA_ALIAS = "replica"
+STICKY_KEY = "db:primary:{owner}"
+
+# Lo activa BaseModelViewSet solo durante las acciones de lectura segura
+replica_reads = contextvars.ContextVar("replica_reads", default=False)
+
+
+def has_replica():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def pin_to_primary(owners):
+    """
+    Lee de la primaria durante DATABASE_REPLICA_STICKY_SECONDS para cada
+    propietario: sus lecturas ven sus propias escrituras aunque la réplica
+    vaya con retraso. El plazo empieza al confirmar la transacción en curso.
+    """
+    timeout = getattr(settings, "DATABASE_REPLICA_STICKY_SECONDS", 5)
+    if not has_replica() or not timeout:
+        return
+    keys = {STICKY_KEY.format(owner=owner): True for owner in owners}
+    transaction.on_commit(lambda: cache.set_many(keys, timeout))
+
+
+def is_pinned_to_primary(owners):
+    keys = [STICKY_KEY.format(owner=owner) for owner in owners]
+    return bool(cache.get_many(keys))
+
+
+class PrimaryReplicaRouter:
+    """
+    Escrituras siempre en la primaria; lecturas en la réplica solo dentro
+    de replica_reads. Fuera de él (autenticación, escrituras, tareas y
+    comandos) todo va a la primaria, también las lecturas de relaciones
+    de instancias cargadas desde la réplica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if replica_reads.get() and has_replica():
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias son la misma base de datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación
+        return db != REPLICA_ALIAS
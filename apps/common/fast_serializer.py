@@ -0,0 +1,187 @@
+import decimal
+import functools
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework import ISO_8601, fields, relations, serializers
+from rest_framework.settings import api_settings
+
+
+class FastListSerializer:
+    """
+    Serializa filas de .values() con conversores precompilados por campo.
+
+    Reproduce la salida de un ModelSerializer de solo lectura (mismas claves,
+    mismo orden y mismo formato de Decimal y fechas) sin resolver atributos
+    ni recorrer los campos de DRF fila a fila. Los campos sin conversor
+    propio delegan en field.to_representation().
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.fields = []
+        for field in serializer._readable_fields:
+            self.fields.append(
+                (field.field_name, field.source, self.get_converter(field))
+            )
+        self.sources = [source for _, source, _ in self.fields]
+
+    @classmethod
+    def compile(cls, serializer_class):
+        """
+        Devuelve el serializer rápido, o None si serializer_class no lo admite.
+
+        Se compila una vez por clase y zona horaria activa (lo único externo
+        a la clase de lo que dependen los conversores) y se reutiliza en cada
+        petición.
+        """
+        current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        return get_compiled(cls, serializer_class, current_timezone)
+
+    @classmethod
+    def build(cls, serializer_class):
+        """Como compile(), sin pasar por la caché."""
+        if not issubclass(serializer_class, serializers.ModelSerializer):
+            return None
+        # Un to_representation() propio puede cambiar la salida
+        if serializer_class.to_representation is not (
+            serializers.Serializer.to_representation
+        ):
+            return None
+
+        model = serializer_class.Meta.model
+        for field in serializer_class()._readable_fields:
+            if field.source == "*" or "." in field.source:
+                return None
+            # FileField usa la petición del contexto para la URL absoluta
+            if isinstance(
+                field,
+                (
+                    serializers.BaseSerializer,
+                    relations.ManyRelatedField,
+                    fields.FileField,
+                ),
+            ):
+                return None
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+            if model_field.is_relation and not isinstance(
+                field, relations.PrimaryKeyRelatedField
+            ):
+                return None
+        return cls(serializer_class)
+
+    def get_converter(self, field):
+        """Conversor del valor de .values() para field; None si es la identidad."""
+        if isinstance(field, relations.PrimaryKeyRelatedField):
+            # .values("fk") ya devuelve la clave primaria
+            return field.pk_field.to_representation if field.pk_field else None
+        if isinstance(field, fields.DecimalField):
+            return self.get_decimal_converter(field)
+        if isinstance(field, fields.DateTimeField):
+            return self.get_datetime_converter(field)
+        if isinstance(field, fields.ChoiceField):
+            choices = field.choice_strings_to_values
+            return lambda value: (
+                value if value == "" else choices.get(str(value), value)
+            )
+        if isinstance(field, fields.CharField):
+            return str
+        if isinstance(field, fields.IntegerField):
+            return int
+        if isinstance(field, fields.BooleanField):
+            return lambda value: (
+                value
+                if value is True or value is False
+                else field.to_representation(value)
+            )
+        if type(field) is fields.ReadOnlyField:
+            return None
+        return field.to_representation
+
+    def get_decimal_converter(self, field):
+        coerce_to_string = getattr(
+            field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+        )
+        if (
+            not coerce_to_string
+            or field.localize
+            or field.normalize_output
+            or field.decimal_places is None
+        ):
+            return field.to_representation
+
+        exponent = decimal.Decimal(".1") ** field.decimal_places
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        rounding = field.rounding
+
+        def convert(value):
+            if not isinstance(value, decimal.Decimal):
+                return field.to_representation(value)
+            return f"{value.quantize(exponent, rounding=rounding, context=context):f}"
+
+        return convert
+
+    def get_datetime_converter(self, field):
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+        if hasattr(field, "timezone"):
+            field_timezone = field.timezone
+        else:
+            field_timezone = (
+                timezone.get_current_timezone() if settings.USE_TZ else None
+            )
+        if field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            if value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+            return value
+
+        return convert
+
+    def values(self, queryset, extra=()):
+        """queryset.values() con las columnas necesarias (y extra, p. ej. de orden)."""
+        names = dict.fromkeys([*self.sources, *extra])
+        return queryset.values(*names)
+
+    def to_representation(self, rows):
+        columns = self.fields
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, convert in columns:
+                value = row[source]
+                if value is not None and convert is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+
+@functools.lru_cache(maxsize=256)
+def get_compiled(fast_class, serializer_class, current_timezone):
+    # current_timezone solo forma parte de la clave: los conversores de
+    # fechas fijan la zona activa al compilarse
+    return fast_class.build(serializer_class)
+
+
+@receiver(setting_changed)
+def clear_compiled_cache(setting, **kwargs):
+    # Formatos de Decimal y fechas de REST_FRAMEWORK, y zona horaria
+    if setting in ("REST_FRAMEWORK", "USE_TZ", "TIME_ZONE"):
+        get_compiled.cache_clear()
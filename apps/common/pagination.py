@@ -0,0 +1,154 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed, unique, non-null ordering.
+
+    The cursor is an opaque token holding the ordering values of the last
+    row of the previous page, so every page is a single index range scan
+    no matter how deep the client goes.
+    """
+
+    # Must end with a unique field, e.g. ("-payment_date", "-id")
+    ordering = None
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.get_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Igual que paginate_queryset(), leyendo la página con el ORM async."""
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.get_page([row async for row in queryset.aiterator()])
+
+    def get_page_queryset(self, queryset, request):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+
+        queryset = queryset.order_by(*self.ordering)
+        self.start_position = self.get_start_position(request, queryset.model)
+        if self.start_position is not None:
+            queryset = queryset.filter(self.get_seek_filter(self.start_position))
+        return queryset[: self.page_size + 1]
+
+    def get_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        # Posición de la última fila servida, o la de partida si no hay filas
+        if rows:
+            self.last_position = self.get_position(rows[-1])
+        else:
+            self.last_position = self.start_position
+        self.next_position = self.last_position if self.has_next else None
+        return rows
+
+    def get_start_position(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        return self.decode_cursor(encoded, model)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict([("next", self.get_next_link()), ("results", data)])
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                value = int(request.query_params[self.page_size_query_param])
+                if value > 0:
+                    return min(value, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    @property
+    def position_fields(self):
+        return [name.lstrip("-") for name in self.ordering]
+
+    def get_position(self, row):
+        # Admite instancias del modelo y filas de .values()
+        if isinstance(row, dict):
+            return [row[name] for name in self.position_fields]
+        return [getattr(row, name) for name in self.position_fields]
+
+    def get_seek_filter(self, position):
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            equal = {
+                prev: value
+                for prev, value in zip(self.position_fields[:index], position)
+            }
+            condition |= Q(**equal, **{f"{field}__{lookup}": position[index]})
+        return condition
+
+    def encode_cursor(self, position):
+        values = [
+            value.isoformat() if hasattr(value, "isoformat") else str(value)
+            for value in position
+        ]
+        data = json.dumps(values, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, encoded, model):
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.position_fields, values)
+            ]
+            if None in position:
+                raise ValueError
+            return position
+        except (binascii.Error, UnicodeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,53 @@
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer sobre orjson, con la misma salida que el de DRF salvo en
+    algunos float.
+
+    Las fechas, Decimal, cadenas diferidas, etc. pasan por el mismo
+    encoder_class de DRF, así que amount y payment_date se serializan igual.
+    Sin orjson, con opciones que orjson no reproduce (ensure_ascii,
+    separadores largos, NaN no estricto, sangría distinta de 2) o con valores
+    que no admite (p. ej. enteros de más de 64 bits) se usa json de stdlib.
+
+    Diferencias con JSONRenderer, solo en float:
+    - exponentes: orjson escribe 1e16 y 1e-7 donde json escribe 1e+16 y
+      1e-07 (el mismo número para cualquier parser JSON);
+    - NaN e Infinity: orjson los escribe como null, mientras que DRF con
+      STRICT_JSON lanza ValueError.
+    Detectarlos exigiría recorrer los datos o la salida, lo que cuesta tanto
+    como el propio orjson. Los serializers de la API no producen float: los
+    importes son Decimal y salen como cadena.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent not in (None, 2):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=option
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Igual que DRF: escapar U+2028 y U+2029 (subconjunto estricto de JS)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
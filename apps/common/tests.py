@@ -1,3 +1,222 @@
-from django.test import TestCase
+import datetime
+import io
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.cache import get_generation, invalidate_owners
+from apps.common.db_router import (
+    PrimaryReplicaRouter,
+    is_pinned_to_primary,
+    pin_to_primary,
+    replica_reads,
+)
+from apps.common.fast_serializer import FastListSerializer
+from apps.common.parsers import ORJSONParser
+from apps.common.renderers import ORJSONRenderer, orjson
+from apps.manager.models import User
+
+
+class InvalidateOwnersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generation_changes_only_after_commit(self):
+        before = get_generation("test", 1)
+        other = get_generation("test", 2)
+        everyone = get_generation("test", "all")
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                invalidate_owners("test", [1])
+                # Una lectura concurrente aún vería los datos anteriores
+                self.assertEqual(get_generation("test", 1), before)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(get_generation("test", 1), before)
+        self.assertEqual(get_generation("test", 2), other)
+        self.assertNotEqual(get_generation("test", "all"), everyone)
+
+    def test_rolled_back_write_keeps_generation(self):
+        before = get_generation("test", 1)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    invalidate_owners("test", [1])
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_generation("test", 1), before)
+
+    def test_evicted_generation_starts_fresh(self):
+        before = get_generation("test", 1)
+        cache.clear()
+
+        self.assertNotEqual(get_generation("test", 1), before)
+
+
+class FastListSerializerTests(SimpleTestCase):
+    def compile(self, **declared):
+        meta = type("Meta", (), {"model": User, "fields": ["email", *declared]})
+        serializer_class = type(
+            "UserSerializer",
+            (serializers.ModelSerializer,),
+            {"Meta": meta, **declared},
+        )
+        return FastListSerializer.compile(serializer_class)
+
+    def test_compiles_plain_model_fields(self):
+        self.assertIsNotNone(self.compile())
+
+    def test_rejects_fields_it_cannot_reproduce(self):
+        self.assertIsNone(self.compile(full_name=serializers.SerializerMethodField()))
+        self.assertIsNone(
+            self.compile(groups_count=serializers.IntegerField(source="groups.count"))
+        )
+
+    def test_converts_values_rows(self):
+        fast = self.compile()
+
+        self.assertEqual(
+            fast.to_representation([{"email": "ana@example.com"}]),
+            [{"email": "ana@example.com"}],
+        )
+
+    def test_compiles_once_per_serializer_class(self):
+        meta = type("Meta", (), {"model": User, "fields": ["email"]})
+        serializer_class = type(
+            "UserSerializer", (serializers.ModelSerializer,), {"Meta": meta}
+        )
+        rejected_meta = type(
+            "Meta", (), {"model": User, "fields": ["email", "full_name"]}
+        )
+        rejected_class = type(
+            "UserSerializer",
+            (serializers.ModelSerializer,),
+            {"Meta": rejected_meta, "full_name": serializers.SerializerMethodField()},
+        )
+
+        with mock.patch.object(
+            FastListSerializer, "build", wraps=FastListSerializer.build
+        ) as build:
+            fast = FastListSerializer.compile(serializer_class)
+            self.assertIs(FastListSerializer.compile(serializer_class), fast)
+            # Las clases no admitidas también quedan en la caché
+            self.assertIsNone(FastListSerializer.compile(rejected_class))
+            self.assertIsNone(FastListSerializer.compile(rejected_class))
+
+        self.assertEqual(build.call_count, 2)
+
+    def test_each_time_zone_gets_its_own_converters(self):
+        meta = type("Meta", (), {"model": User, "fields": ["last_login"]})
+        serializer_class = type(
+            "UserSerializer", (serializers.ModelSerializer,), {"Meta": meta}
+        )
+        row = {"last_login": datetime.datetime(2025, 1, 15, 10, tzinfo=datetime.UTC)}
+
+        utc = FastListSerializer.compile(serializer_class)
+        with timezone.override("Europe/Madrid"):
+            madrid = FastListSerializer.compile(serializer_class)
+
+        self.assertEqual(
+            utc.to_representation([row]), [{"last_login": "2025-01-15T10:00:00Z"}]
+        )
+        self.assertEqual(
+            madrid.to_representation([row]),
+            [{"last_login": "2025-01-15T11:00:00+01:00"}],
+        )
+
+
+@skipIf(orjson is None, "orjson no está instalado")
+class ORJSONRendererTests(SimpleTestCase):
+    def assertSameOutput(self, data, media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_matches_drf_for_api_values(self):
+        self.assertSameOutput(
+            {
+                "amount": Decimal("10.50"),
+                "payment_date": datetime.datetime(
+                    2025, 1, 15, 10, 0, tzinfo=datetime.timezone.utc
+                ),
+                "day": datetime.date(2025, 1, 1),
+                "message": _("Expense created successfully"),
+                "description": "línea separada",
+                "results": [{"count": 1, "user": None, "is_active": True}],
+            }
+        )
+
+    def test_matches_drf_with_indent(self):
+        self.assertSameOutput({"a": [1, {"b": "c"}]}, "application/json; indent=2")
+
+    def test_falls_back_for_unsupported_values(self):
+        self.assertSameOutput({"big": 2**70})
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+@skipIf(orjson is None, "orjson no está instalado")
+class ORJSONParserTests(SimpleTestCase):
+    def parse(self, body, media_type="application/json"):
+        return ORJSONParser().parse(io.BytesIO(body), media_type, {})
+
+    def test_parses_utf8_bodies(self):
+        self.assertEqual(self.parse('{"a": "café"}'.encode()), {"a": "café"})
+
+    def test_rejects_malformed_json_and_nan(self):
+        with self.assertRaises(ParseError):
+            self.parse(b'{"a": ')
+        with self.assertRaises(ParseError):
+            self.parse(b'{"a": NaN}')
+
+
+class PrimaryReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.model = get_user_model()
+
+    def test_reads_use_replica_only_inside_replica_reads(self):
+        with mock.patch("apps.common.db_router.has_replica", return_value=True):
+            self.assertEqual(self.router.db_for_read(self.model), "default")
+            token = replica_reads.set(True)
+            try:
+                self.assertEqual(self.router.db_for_read(self.model), "replica")
+                self.assertEqual(self.router.db_for_write(self.model), "default")
+            finally:
+                replica_reads.reset(token)
+
+    def test_without_replica_alias_reads_stay_on_primary(self):
+        token = replica_reads.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(self.model), "default")
+        finally:
+            replica_reads.reset(token)
+
+    def test_replica_is_never_migrated(self):
+        self.assertTrue(self.router.allow_migrate("default", "expenses"))
+        self.assertFalse(self.router.allow_migrate("replica", "expenses"))
+
+    def test_pin_starts_after_commit(self):
+        with mock.patch("apps.common.db_router.has_replica", return_value=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                pin_to_primary([1])
+                self.assertFalse(is_pinned_to_primary([1]))
+            self.assertTrue(is_pinned_to_primary([1, 2]))
+            self.assertFalse(is_pinned_to_primary([2]))
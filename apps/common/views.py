@@ -1,9 +1,30 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_etags
 from rest_framework.exceptions import PermissionDenied
 from rest_framework import viewsets
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
 from rest_framework import status
 
+from apps.common.cache import (
+    compute_etag,
+    invalidate_owners,
+    request_fingerprint,
+    response_cache_key,
+    weak_etag,
+)
+from apps.common.db_router import (
+    is_pinned_to_primary,
+    pin_to_primary,
+    replica_reads,
+)
+from apps.common.fast_serializer import FastListSerializer
+
 
 def get_user_fullname(user):
     if not user or not user.is_authenticated:
@@ -13,6 +34,78 @@ def get_user_fullname(user):
 
 
 class BaseModelViewSet(viewsets.ModelViewSet):
+    # Espacio de nombres de la caché de respuestas; None la desactiva
+    cache_namespace = None
+    # Campo de auditoría del que se derivan ETag y Last-Modified
+    conditional_field = "updated_date"
+
+    # Listados con FastListSerializer sobre .values() en lugar del serializer
+    fast_list = False
+    # Acciones GET que pueden leer de la réplica (ver apps.common.db_router)
+    replica_actions = ("list", "retrieve")
+
+    def dispatch(self, request, *args, **kwargs):
+        token = replica_reads.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        # Autenticación y permisos siempre contra la primaria
+        super().initial(request, *args, **kwargs)
+        if self.use_replica(request):
+            replica_reads.set(True)
+
+    def use_replica(self, request):
+        if (
+            request.method not in SAFE_METHODS
+            or self.action not in self.replica_actions
+        ):
+            return False
+        if not request.user.is_authenticated:
+            return True
+        # Quien acaba de escribir lee de la primaria durante un tiempo
+        return not is_pinned_to_primary({request.user.pk, self.get_cache_owner()})
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Solo escrituras aceptadas: las rechazadas no cambian nada
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary([request.user.pk])
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators(request)
+        return self.conditional_response(
+            request, etag, last_modified, self.list_rows, *args, **kwargs
+        )
+
+    def list_rows(self, request, *args, **kwargs):
+        fast = None
+        if self.fast_list:
+            fast = FastListSerializer.compile(self.get_serializer_class())
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # La paginación por keyset necesita las columnas de orden en cada fila
+        extra = getattr(self.paginator, "position_fields", ())
+        rows = fast.values(queryset, extra)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.to_representation(page))
+        return Response(fast.to_representation(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        etag, last_modified = self.get_object_validators(request)
+        return self.conditional_response(
+            request, etag, last_modified, super().retrieve, *args, **kwargs
+        )
+
     def perform_create(self, serializer):
         request = self.request
         user = request.user
@@ -20,6 +113,7 @@ class BaseModelViewSet(viewsets.ModelViewSet):
         if user.is_authenticated:
             full_name = get_user_fullname(user)
             serializer.save(created_by=full_name, created_date=timezone.now())
+            self.invalidate_cache(self.get_cache_owners(serializer.instance))
         else:
             raise PermissionDenied("Usuario no autenticado")
 
@@ -30,6 +124,7 @@ class BaseModelViewSet(viewsets.ModelViewSet):
         if user.is_authenticated:
             full_name = get_user_fullname(user)
             serializer.save(updated_by=full_name, updated_date=timezone.now())
+            self.invalidate_cache(self.get_cache_owners(serializer.instance))
         else:
             raise PermissionDenied("Usuario no autenticado")
 
@@ -48,3 +143,139 @@ class BaseModelViewSet(viewsets.ModelViewSet):
             instance.deleted_date = timezone.now()
             instance.is_active = False
             instance.save()
+        self.invalidate_cache(self.get_cache_owners(instance))
+
+    def has_conditional_field(self):
+        if self.conditional_field is None:
+            return False
+        try:
+            self.get_queryset().model._meta.get_field(self.conditional_field)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    def get_list_validators(self, request):
+        """
+        ETag del listado a partir de Max(conditional_field) y Count() sobre
+        el queryset filtrado: una sola consulta agregada, sin leer filas.
+
+        No se emite Last-Modified: una baja lógica saca la fila del listado
+        sin aumentar el máximo, y solo el recuento la detecta.
+        """
+        if not self.has_conditional_field():
+            return None, None
+        state = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .aggregate(last_modified=Max(self.conditional_field), count=Count("pk"))
+        )
+        etag = weak_etag(
+            request_fingerprint(request, self.action),
+            request.user.pk,
+            state["count"],
+            state["last_modified"],
+        )
+        return etag, None
+
+    def get_object_validators(self, request):
+        """ETag y Last-Modified del detalle leyendo solo conditional_field."""
+        if not self.has_conditional_field():
+            return None, None
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            last_modified = (
+                self.filter_queryset(self.get_queryset())
+                .filter(**lookup)
+                .values_list(self.conditional_field, flat=True)
+                .first()
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Que retrieve() responda el 404 habitual
+            return None, None
+        if last_modified is None:
+            return None, None
+        etag = weak_etag(
+            request_fingerprint(request, self.action),
+            request.user.pk,
+            last_modified,
+        )
+        return etag, last_modified
+
+    def conditional_response(self, request, etag, last_modified, view, *args, **kwargs):
+        """
+        Responde 304 sin consultar ni serializar filas si el cliente ya tiene
+        la versión actual; en otro caso delega en view() y añade validadores.
+
+        Los permisos por objeto no se evalúan antes del 304: los de este
+        proyecto son de vista y ya se comprobaron en initial().
+        """
+        if etag is None and last_modified is None:
+            return view(request, *args, **kwargs)
+
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(
+            request._request, etag=etag, last_modified=timestamp
+        )
+        if not_modified is not None:
+            response = Response(status=not_modified.status_code)
+        else:
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        if etag is not None:
+            response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        response["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(response, ["Authorization"])
+        return response
+
+    def get_cache_owner(self):
+        """Propietario de las respuestas guardadas para la petición actual."""
+        return self.request.user.pk
+
+    def get_cache_owners(self, instance):
+        """Propietarios cuyas respuestas quedan obsoletas al escribir instance."""
+        return [self.request.user.pk]
+
+    def invalidate_cache(self, owners):
+        if self.cache_namespace is not None:
+            invalidate_owners(self.cache_namespace, owners)
+            # Que una réplica atrasada no vuelva a llenar la caché con datos viejos
+            pin_to_primary({*owners, "all"})
+
+    def cached_response(self, request, view, *args, **kwargs):
+        """
+        Sirve view() desde la caché mientras no cambie la generación del
+        propietario, y responde 304 si el cliente ya tiene esa versión.
+        """
+        if self.cache_namespace is None or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        key = response_cache_key(
+            self.cache_namespace, self.get_cache_owner(), request, self.action
+        )
+        cached = cache.get(key)
+        if cached is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            # Conservar el validador de conditional_response() si lo hay
+            data = response.data
+            etag = response.get("ETag") or compute_etag(data)
+            cache.set(
+                key, (data, etag), getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+            )
+        else:
+            data, etag = cached
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(response, ["Authorization"])
+        return response
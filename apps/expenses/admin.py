@@ -1,7 +1,10 @@
 from django.utils import timezone
 from django.contrib import admin
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from .models import Expense
+from .cache import invalidate_expense_cache
+from .rollups import record_expense_change, record_queryset_change, rollup_key
 
 
 @admin.register(Expense)
@@ -83,13 +86,28 @@ class ExpenseAdmin(admin.ModelAdmin):
         else:  # Actualización
             obj.updated_by = request.user.get_full_name() or request.user.username
 
-        super().save_model(request, obj, form, change)
+        with transaction.atomic():
+            before = rollup_key(Expense.objects.filter(pk=obj.pk).first())
+            super().save_model(request, obj, form, change)
+            record_expense_change(before, rollup_key(obj))
+        invalidate_expense_cache({obj.user_id, before and before[0][0]} - {None})
 
     def delete_model(self, request, obj):
 
-        obj.is_active = False
-        obj.deleted_by = request.user.get_full_name() or request.user.username
-        obj.save()
+        with transaction.atomic():
+            before = rollup_key(obj)
+            obj.is_active = False
+            obj.deleted_by = request.user.get_full_name() or request.user.username
+            obj.save()
+            record_expense_change(before, None)
+        invalidate_expense_cache([obj.user_id])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            # Se aplica al confirmar: ver invalidate_owners
+            invalidate_expense_cache(set(queryset.values_list("user_id", flat=True)))
+            record_queryset_change(queryset.filter(is_active=True), -1)
+            super().delete_queryset(request, queryset)
 
     def has_delete_permission(self, request, obj=None):
         return True
@@ -97,17 +115,30 @@ class ExpenseAdmin(admin.ModelAdmin):
     actions = ["soft_delete_selected", "activate_selected"]
 
     def soft_delete_selected(self, request, queryset):
-        updated = queryset.update(
-            is_active=False,
-            deleted_by=request.user.get_full_name() or request.user.username,
-            deleted_date=timezone.now(),
-        )
+        with transaction.atomic():
+            invalidate_expense_cache(set(queryset.values_list("user_id", flat=True)))
+            record_queryset_change(queryset.filter(is_active=True), -1)
+            # update() no aplica auto_now: updated_date alimenta los ETag
+            now = timezone.now()
+            updated = queryset.update(
+                is_active=False,
+                deleted_by=request.user.get_full_name() or request.user.username,
+                deleted_date=now,
+                updated_date=now,
+            )
         self.message_user(request, _("Se desactivaron {} gastos").format(updated))
 
     soft_delete_selected.short_description = _("Desactivar gastos seleccionados")
 
     def activate_selected(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        with transaction.atomic():
+            invalidate_expense_cache(set(queryset.values_list("user_id", flat=True)))
+            record_queryset_change(queryset.filter(is_active=False), 1)
+            updated = queryset.update(
+                is_active=True,
+                updated_by=request.user.get_full_name() or request.user.username,
+                updated_date=timezone.now(),
+            )
         self.message_user(request, _("Se activaron {} gastos").format(updated))
 
     activate_selected.short_description = _("Activar gastos seleccionados")
@@ -0,0 +1,8 @@
+from apps.common.cache import invalidate_owners
+
+CACHE_NAMESPACE = "expenses"
+
+
+def invalidate_expense_cache(user_ids):
+    """Invalida las respuestas guardadas de gastos de esos usuarios."""
+    invalidate_owners(CACHE_NAMESPACE, user_ids)
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+
+from django.utils import timezone
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+# Columna exportada -> columna de values_list()
+EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("amount", "amount"),
+    ("description", "description"),
+    ("type", "type"),
+    ("user", "user_id"),
+    ("payment_date", "payment_date"),
+)
+
+
+def format_datetime(value):
+    # Mismo formato ISO 8601 que DateTimeField de DRF
+    value = timezone.localtime(value).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def export_rows(queryset, chunk_size):
+    columns = [column for _, column in EXPORT_COLUMNS]
+    for (
+        pk,
+        amount,
+        description,
+        expense_type,
+        user_id,
+        payment_date,
+    ) in queryset.values_list(*columns).iterator(chunk_size=chunk_size):
+        yield (
+            pk,
+            str(amount),
+            description,
+            expense_type,
+            user_id,
+            format_datetime(payment_date),
+        )
+
+
+def stream_csv(queryset, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+
+    for index, row in enumerate(export_rows(queryset, chunk_size), 1):
+        writer.writerow(row)
+        if index % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(queryset, chunk_size):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    lines = []
+    for row in export_rows(queryset, chunk_size):
+        lines.append(
+            json.dumps(dict(zip(names, row)), ensure_ascii=False, separators=(",", ":"))
+        )
+        if len(lines) == chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+EXPORT_STREAMS = {"csv": stream_csv, "ndjson": stream_ndjson}
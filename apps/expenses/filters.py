@@ -1,7 +1,7 @@
 import datetime
 from django.utils import timezone
 from django_filters import rest_framework as filters
-from .models import Expense
+from .models import Expense, ExpenseMonthlyRollup
 
 
 class ExpenseFilter(filters.FilterSet):
@@ -29,3 +29,9 @@ class ExpenseFilter(filters.FilterSet):
             return queryset.filter(payment_date__gte=start_date)
 
         return queryset
+
+
+class ExpenseMonthlyRollupFilter(filters.FilterSet):
+    class Meta:
+        model = ExpenseMonthlyRollup
+        fields = ["user", "type"]
@@ -0,0 +1,304 @@
+import codecs
+import csv
+import datetime
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.manager.models import User
+from .models import Expense
+from .rollups import record_rows_created
+from .validators import validate_expense_amount, validate_expense_type
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+AMOUNT_STEP = Decimal("0.01")
+# Expense.amount: max_digits=10, decimal_places=2
+AMOUNT_LIMIT = Decimal("100000000")
+DESCRIPTION_MAX_LENGTH = Expense._meta.get_field("description").max_length
+
+
+def guess_format(filename, default="csv"):
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension in ("ndjson", "jsonl"):
+        return "ndjson"
+    if extension == "csv":
+        return "csv"
+    return default
+
+
+class ImportFileError(ValueError):
+    """
+    El archivo no se puede leer (codificación o CSV mal formado). stats
+    tiene el recuento hasta el error: los lotes anteriores ya se insertaron.
+    """
+
+    def __init__(self, message, line=None, offset=None):
+        super().__init__(message)
+        self.line = line
+        self.offset = offset
+        self.stats = None
+
+
+def decode_lines(binary, encoding="utf-8"):
+    """
+    Decodifica un flujo binario línea a línea para situar los bytes
+    inválidos: ImportFileError con la línea y el byte donde empieza.
+    Quita el BOM de UTF-8 si lo hay.
+    """
+    offset = 0
+    for number, raw in enumerate(binary, 1):
+        if number == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw, offset = raw[len(codecs.BOM_UTF8) :], len(codecs.BOM_UTF8)
+        try:
+            yield raw.decode(encoding)
+        except UnicodeDecodeError as exc:
+            raise ImportFileError(
+                f"Invalid {encoding} byte at line {number}, byte {offset + exc.start}.",
+                line=number,
+                offset=offset + exc.start,
+            )
+        offset += len(raw)
+
+
+def read_rows(stream, file_format):
+    """Genera diccionarios de fila desde un flujo de texto CSV o NDJSON."""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        try:
+            for row in reader:
+                yield row
+        except csv.Error as exc:
+            # La línea física del lector interno: la de DictReader no avanza
+            # hasta completar la fila
+            line = reader.reader.line_num
+            raise ImportFileError(f"Malformed CSV at line {line}: {exc}.", line=line)
+        return
+
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {"__invalid__": line}
+
+
+class ExpenseRowParser:
+    """
+    Valida filas sueltas con las mismas reglas que ExpenseCreateSerializer,
+    sin construir un serializer de DRF por fila.
+    """
+
+    def __init__(self, default_user=None, owner=None):
+        self.default_user = default_user
+        # Si se indica, solo se aceptan filas de este usuario
+        self.owner = owner
+        self._users = {}
+
+    def parse(self, row):
+        if "__invalid__" in row:
+            raise ValidationError({"row": ["Invalid JSON object."]})
+
+        errors = {}
+        values = {}
+        for name in ("amount", "description", "type", "user", "payment_date"):
+            try:
+                values[name] = getattr(self, f"parse_{name}")(row.get(name))
+            except ValidationError as exc:
+                errors[name] = exc.messages
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+    def parse_amount(self, value):
+        if value is None or isinstance(value, bool):
+            raise ValidationError("A valid number is required.")
+        try:
+            amount = Decimal(str(value).strip())
+        except (InvalidOperation, ValueError):
+            raise ValidationError("A valid number is required.")
+        if not amount.is_finite():
+            raise ValidationError("A valid number is required.")
+        if amount != amount.quantize(AMOUNT_STEP):
+            raise ValidationError(
+                "Ensure that there are no more than 2 decimal places."
+            )
+        if abs(amount) >= AMOUNT_LIMIT:
+            raise ValidationError(
+                "Ensure that there are no more than 10 digits in total."
+            )
+        validate_expense_amount(amount)
+        return amount
+
+    def parse_description(self, value):
+        if value is None or str(value).strip() == "":
+            raise ValidationError("This field is required.")
+        value = str(value).strip()
+        if len(value) > DESCRIPTION_MAX_LENGTH:
+            raise ValidationError(
+                f"Ensure this field has no more than {DESCRIPTION_MAX_LENGTH} characters."
+            )
+        return value
+
+    def parse_type(self, value):
+        if not isinstance(value, str):
+            raise ValidationError("This field is required.")
+        validate_expense_type(value)
+        return value
+
+    def parse_user(self, value):
+        if value is None or value == "":
+            if self.default_user is None:
+                raise ValidationError("This field is required.")
+            return self.default_user.pk
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError("Incorrect type. Expected pk value.")
+        if self.owner is not None and pk != self.owner.pk:
+            raise ValidationError("You can only import your own expenses.")
+        if pk not in self._users:
+            self._users[pk] = User.objects.filter(pk=pk).exists()
+        if not self._users[pk]:
+            raise ValidationError(f'Invalid pk "{pk}" - object does not exist.')
+        return pk
+
+    def parse_payment_date(self, value):
+        if value is None or value == "":
+            return timezone.now()
+        value = str(value).strip()
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                day = parse_date(value)
+                if day is not None:
+                    parsed = datetime.datetime.combine(day, datetime.time())
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError("Datetime has wrong format.")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+
+def insert_expenses(rows, created_by, created_date):
+    """
+    INSERT por lotes con executemany a partir de valores ya validados.
+
+    Equivale a bulk_create pero sin instanciar modelos ni preparar cada
+    valor a través de los campos del ORM, que domina el coste en cargas
+    de millones de filas.
+    """
+    ops = connection.ops
+    columns = (
+        "amount",
+        "description",
+        "type",
+        "user_id",
+        "payment_date",
+        "is_active",
+        "created_by",
+        "created_date",
+        "updated_date",
+    )
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        ops.quote_name(Expense._meta.db_table),
+        ", ".join(ops.quote_name(column) for column in columns),
+        ", ".join(["%s"] * len(columns)),
+    )
+    # Igual que auto_now_add/auto_now en un alta: updated_date = created_date
+    created_date = ops.adapt_datetimefield_value(created_date)
+    params = [
+        (
+            ops.adapt_decimalfield_value(amount, 10, 2),
+            description,
+            expense_type,
+            user_id,
+            ops.adapt_datetimefield_value(payment_date),
+            True,
+            created_by,
+            created_date,
+            created_date,
+        )
+        for amount, description, expense_type, user_id, payment_date in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def import_expenses(
+    rows,
+    created_by=None,
+    default_user=None,
+    owner=None,
+    batch_size=5000,
+    on_reject=None,
+    on_progress=None,
+):
+    """
+    Inserta filas ya leídas en lotes, cada uno en su propia transacción.
+
+    owner limita la importación a ese usuario: las filas de otros se
+    rechazan. on_reject(number, row, errors) recibe cada fila descartada
+    (numerada desde 1, sin contar la cabecera del CSV) y on_progress(stats)
+    se llama tras cada lote. Si el archivo no se puede leer, inserta las
+    filas válidas anteriores y relanza ImportFileError con stats.
+    """
+    parser = ExpenseRowParser(default_user, owner)
+    stats = {"read": 0, "imported": 0, "rejected": 0, "users": set()}
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            # Fecha por lote, no por importación: el feed de cambios ordena
+            # por updated_date y no debe ver lotes confirmados "en el pasado"
+            insert_expenses(batch, created_by, timezone.now())
+            record_rows_created(
+                (user_id, expense_type, payment_date, amount)
+                for amount, _, expense_type, user_id, payment_date in batch
+            )
+        stats["imported"] += len(batch)
+        stats["users"].update(user_id for _, _, _, user_id, _ in batch)
+        batch.clear()
+        if on_progress is not None:
+            on_progress(stats)
+
+    try:
+        for number, row in enumerate(rows, 1):
+            stats["read"] += 1
+            try:
+                values = parser.parse(row)
+            except ValidationError as exc:
+                stats["rejected"] += 1
+                if on_reject is not None:
+                    on_reject(number, row, exc.message_dict)
+                continue
+
+            batch.append(
+                (
+                    values["amount"],
+                    values["description"],
+                    values["type"],
+                    values["user"],
+                    values["payment_date"],
+                )
+            )
+            if len(batch) >= batch_size:
+                flush()
+    except ImportFileError as exc:
+        if batch:
+            flush()
+        exc.stats = stats
+        raise
+
+    if batch:
+        flush()
+    return stats
@@ -0,0 +1,206 @@
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.test.utils import override_settings
+
+from apps.authentication.utils import generate_access_token
+from apps.expenses.models import Expense
+from apps.manager.models import User
+
+from .benchmark_expense_indexes import Command as IndexBenchmark
+
+# (nombre, variables de entorno del perfil)
+SQLITE_PROFILES = [
+    ("SQLite sin ajustes", {"SQLITE_TUNING": "0", "DATABASE_CONN_MAX_AGE": "0"}),
+    ("SQLite WAL", {"SQLITE_TUNING": "1", "DATABASE_CONN_MAX_AGE": "0"}),
+    (
+        "SQLite WAL + conexiones persistentes",
+        {"SQLITE_TUNING": "1", "DATABASE_CONN_MAX_AGE": "60"},
+    ),
+]
+POSTGRESQL_PROFILES = [
+    ("PostgreSQL sin persistencia", {"DATABASE_CONN_MAX_AGE": "0"}),
+    ("PostgreSQL persistente", {"DATABASE_CONN_MAX_AGE": "60"}),
+    ("PostgreSQL con pool", {"DATABASE_POOL": "4:16"}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara peticiones/s de la API de gastos (lecturas de detalle y un "
+        "porcentaje de altas) con cada perfil de DATABASES: SQLite sin "
+        "ajustes, con WAL y con conexiones persistentes, o PostgreSQL sin "
+        "persistencia, persistente y con pool si DATABASE_ENGINE=postgresql. "
+        "Cada perfil se ejecuta en un proceso aparte con su entorno."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2_000)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--writes",
+            type=float,
+            default=10.0,
+            help="Porcentaje de peticiones que crean un gasto",
+        )
+        parser.add_argument("--rows", type=int, default=20_000)
+        # Uso interno: medir un perfil en este proceso
+        parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            result = self.run_worker(options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        if settings.DATABASE_ENGINE == "postgresql":
+            self.run_profiles(POSTGRESQL_PROFILES, {}, options)
+            IndexBenchmark(stdout=self.stdout, stderr=self.stderr).cleanup()
+            return
+
+        # SQLite: una base de datos temporal para no tocar la del proyecto
+        with tempfile.TemporaryDirectory() as directory:
+            env = {"DATABASE_NAME": os.path.join(directory, "benchmark.sqlite3")}
+            self.call_subprocess(["migrate", "-v0"], env)
+            self.run_profiles(SQLITE_PROFILES, env, options)
+
+    def run_profiles(self, profiles, base_env, options):
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"\n== {options['requests']} peticiones, {options['concurrency']} "
+                f"hilos, {options['writes']:g}% altas =="
+            )
+        )
+        for name, env in profiles:
+            output = self.call_subprocess(
+                [
+                    "benchmark_db_profiles",
+                    "--worker",
+                    f"--requests={options['requests']}",
+                    f"--concurrency={options['concurrency']}",
+                    f"--writes={options['writes']}",
+                    f"--rows={options['rows']}",
+                ],
+                {**base_env, **env},
+            )
+            result = json.loads(output.strip().splitlines()[-1])
+            line = (
+                f"{name}: {result['throughput']:.1f} peticiones/s, "
+                f"p50 {result['p50']:.1f} ms, p95 {result['p95']:.1f} ms"
+            )
+            if result["errors"]:
+                line += f", {result['errors']} errores"
+            self.stdout.write(line)
+
+    def call_subprocess(self, args, env):
+        process = subprocess.run(
+            [sys.executable, str(settings.BASE_DIR / "manage.py"), *args],
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode:
+            raise CommandError(process.stderr or process.stdout)
+        return process.stdout
+
+    def run_worker(self, options):
+        from config.wsgi import application
+
+        if settings.DATABASES["default"]["ENGINE"].endswith("sqlite3") and (
+            "init_command" not in settings.DATABASES["default"]["OPTIONS"]
+        ):
+            # journal_mode se guarda en el fichero: volver al modo por defecto
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode=DELETE")
+
+        seeder = IndexBenchmark(stdout=io.StringIO(), stderr=self.stderr)
+        users = seeder.seed_users(10)
+        seeder.seed_expenses(random.Random(42), users, options["rows"], 10_000)
+        user = User.objects.get(pk=users[0])
+        user.is_staff = True
+        user.save(update_fields=["is_staff"])
+        pks = list(
+            Expense.objects.filter(user=user, is_active=True).values_list(
+                "pk", flat=True
+            )[:500]
+        )
+        connection.close()
+
+        token = generate_access_token(user)
+        body = json.dumps(
+            {
+                "amount": "10.00",
+                "description": "benchmark",
+                "type": "otros",
+                "user": user.pk,
+            }
+        ).encode()
+        rng = random.Random(7)
+        plan = [
+            rng.random() * 100 < options["writes"] for _ in range(options["requests"])
+        ]
+        errors = []
+        lock = threading.Lock()
+
+        def request(write):
+            environ = {
+                "REQUEST_METHOD": "POST" if write else "GET",
+                "PATH_INFO": (
+                    "/api/expenses/expenses/"
+                    if write
+                    else f"/api/expenses/expenses/{rng.choice(pks)}/"
+                ),
+                "SERVER_NAME": "localhost",
+                "HTTP_HOST": "localhost",
+                "HTTP_AUTHORIZATION": f"Bearer {token}",
+                "wsgi.input": io.BytesIO(body if write else b""),
+            }
+            if write:
+                environ["CONTENT_TYPE"] = "application/json"
+                environ["CONTENT_LENGTH"] = str(len(body))
+            setup_testing_defaults(environ)
+
+            started = time.perf_counter()
+            statuses = []
+            try:
+                response = application(
+                    environ, lambda status, *args: statuses.append(status)
+                )
+                b"".join(response)
+                response.close()
+            except DatabaseError as exc:
+                with lock:
+                    errors.append(exc)
+            else:
+                if statuses[0][:3] not in ("200", "201"):
+                    with lock:
+                        errors.append(statuses[0])
+            return time.perf_counter() - started
+
+        # Sin caché de respuestas: medir el acceso a la base de datos
+        with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options["concurrency"]) as pool:
+                latencies = sorted(pool.map(request, plan))
+            elapsed = time.perf_counter() - started
+
+        return {
+            "throughput": len(plan) / elapsed,
+            "p50": statistics.median(latencies) * 1000,
+            "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+            "errors": len(errors),
+        }
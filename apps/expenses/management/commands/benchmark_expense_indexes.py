@@ -0,0 +1,176 @@
+import datetime
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.expenses.models import EXPENSE_TYPE_CHOICES, Expense
+from apps.manager.models import User
+
+BENCH_EMAIL = "bench-{}@benchmark.local"
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera una tabla sintética de gastos y compara planes de consulta y "
+        "tiempos de los patrones de ExpenseFilter sin y con los índices de Expense."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--users", type=int, default=1_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--keep", action="store_true", help="No borrar los datos sintéticos"
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        users = self.seed_users(options["users"])
+        self.seed_expenses(rng, users, options["rows"], options["batch_size"])
+
+        user_id = users[len(users) // 2]
+        queries = self.get_queries(user_id)
+        existing = self.existing_indexes()
+
+        try:
+            self.drop_indexes(existing)
+            self.run_phase("SIN índices", queries, options["repeat"])
+            self.create_indexes()
+            self.run_phase("CON índices", queries, options["repeat"])
+        finally:
+            # Dejar el esquema como estaba antes del benchmark
+            for index in Expense._meta.indexes:
+                if index.name not in existing and index.name in self.existing_indexes():
+                    with connection.schema_editor() as editor:
+                        editor.remove_index(Expense, index)
+                elif (
+                    index.name in existing and index.name not in self.existing_indexes()
+                ):
+                    with connection.schema_editor() as editor:
+                        editor.add_index(Expense, index)
+            if not options["keep"]:
+                self.cleanup()
+
+    def seed_users(self, count):
+        emails = [BENCH_EMAIL.format(i) for i in range(count)]
+        present = set(
+            User.objects.filter(email__in=emails).values_list("email", flat=True)
+        )
+        User.objects.bulk_create(
+            [
+                User(email=email, password="!")
+                for email in emails
+                if email not in present
+            ],
+            batch_size=1000,
+        )
+        return list(
+            User.objects.filter(email__in=emails)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    def seed_expenses(self, rng, users, rows, batch_size):
+        missing = rows - Expense.objects.filter(user_id__in=users).count()
+        if missing <= 0:
+            return
+
+        types = [choice for choice, _ in EXPENSE_TYPE_CHOICES]
+        start = timezone.now() - datetime.timedelta(days=5 * 365)
+        span = 5 * 365 * 24 * 3600
+        self.stdout.write(f"Generando {missing} gastos sintéticos...")
+
+        created = 0
+        while created < missing:
+            size = min(batch_size, missing - created)
+            batch = [
+                Expense(
+                    description="benchmark",
+                    amount=Decimal(rng.randint(1, 100_000)) / 100,
+                    type=rng.choice(types),
+                    user_id=rng.choice(users),
+                    payment_date=start
+                    + datetime.timedelta(seconds=rng.randrange(span)),
+                    is_active=rng.random() > 0.05,
+                    created_by="benchmark",
+                )
+                for _ in range(size)
+            ]
+            with transaction.atomic():
+                Expense.objects.bulk_create(batch, batch_size=batch_size)
+            created += size
+            self.stdout.write(f"  {created}/{missing}")
+
+    def get_queries(self, user_id):
+        today = timezone.now()
+        active = Expense.objects.filter(is_active=True)
+        return {
+            "listado por usuario": active.filter(user_id=user_id).order_by(
+                "-payment_date", "-id"
+            )[:50],
+            "usuario + tipo + rango": active.filter(
+                user_id=user_id,
+                type="ocio",
+                payment_date__gte=today - datetime.timedelta(days=365),
+                payment_date__lte=today,
+            ).order_by("-payment_date")[:50],
+            "usuario + last_3_months": active.filter(
+                user_id=user_id, payment_date__gte=today - datetime.timedelta(days=90)
+            ).order_by("-payment_date")[:50],
+            "listado global": active.order_by("-payment_date", "-id")[:50],
+        }
+
+    def run_phase(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {title} =="))
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"\n{name}: mediana {statistics.median(timings):.2f} ms"
+                )
+            )
+            self.stdout.write(queryset.explain())
+
+    def existing_indexes(self):
+        with connection.cursor() as cursor:
+            return set(
+                connection.introspection.get_constraints(cursor, Expense._meta.db_table)
+            )
+
+    def drop_indexes(self, existing):
+        for index in Expense._meta.indexes:
+            if index.name in existing:
+                with connection.schema_editor() as editor:
+                    editor.remove_index(Expense, index)
+        self.analyze()
+
+    def create_indexes(self):
+        started = time.perf_counter()
+        for index in Expense._meta.indexes:
+            with connection.schema_editor() as editor:
+                editor.add_index(Expense, index)
+        self.analyze()
+        self.stdout.write(f"\nÍndices creados en {time.perf_counter() - started:.1f} s")
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ANALYZE {connection.ops.quote_name(Expense._meta.db_table)}"
+            )
+
+    def cleanup(self):
+        users = User.objects.filter(
+            email__startswith="bench-", email__endswith="@benchmark.local"
+        )
+        Expense.objects.filter(user__in=users).delete()
+        users.delete()
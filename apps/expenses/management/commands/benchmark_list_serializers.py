@@ -0,0 +1,110 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.fast_serializer import FastListSerializer
+from apps.common.renderers import ORJSONRenderer
+from apps.expenses.models import Expense
+from apps.expenses.serializers import ExpenseListSerializer
+from apps.manager.models import User
+from apps.manager.serializers import UserListSerializer
+
+from .benchmark_expense_indexes import Command as IndexBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara filas/s del serializer de DRF y de FastListSerializer, y de "
+        "JSONRenderer frente a ORJSONRenderer, en los listados de gastos y "
+        "usuarios, y verifica que el JSON sea idéntico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50_000)
+        parser.add_argument("--users", type=int, default=1_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--keep", action="store_true", help="No borrar los datos sintéticos"
+        )
+
+    def handle(self, *args, **options):
+        # Reutiliza la generación de datos del benchmark de índices
+        seeder = IndexBenchmark(stdout=self.stdout, stderr=self.stderr)
+        users = seeder.seed_users(options["users"])
+        seeder.seed_expenses(
+            random.Random(42), users, options["rows"], batch_size=10_000
+        )
+
+        cases = {
+            "gastos": (
+                ExpenseListSerializer,
+                Expense.objects.filter(is_active=True).order_by("-payment_date", "-id"),
+            ),
+            "usuarios": (
+                UserListSerializer,
+                User.objects.filter(is_active=True).order_by("id"),
+            ),
+        }
+        try:
+            for name, (serializer_class, queryset) in cases.items():
+                self.run_case(name, serializer_class, queryset, options)
+        finally:
+            if not options["keep"]:
+                seeder.cleanup()
+
+    def run_case(self, name, serializer_class, queryset, options):
+        queryset = queryset[: options["rows"]]
+        renderer = JSONRenderer()
+
+        def drf():
+            serializer = serializer_class(list(queryset), many=True)
+            return renderer.render(serializer.data)
+
+        def fast():
+            compiled = FastListSerializer.compile(serializer_class)
+            if compiled is None:
+                raise CommandError(
+                    f"{serializer_class.__name__} no admite la vía rápida"
+                )
+            return renderer.render(
+                compiled.to_representation(compiled.values(queryset))
+            )
+
+        expected, output = drf(), fast()
+        if expected != output:
+            raise CommandError(f"{name}: la salida de FastListSerializer difiere")
+
+        data = serializer_class(list(queryset), many=True).data
+        if ORJSONRenderer().render(data) != expected:
+            raise CommandError(f"{name}: la salida de ORJSONRenderer difiere")
+
+        rows = queryset.count()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {name} ({rows} filas) =="))
+        self.stdout.write("Serialización + JSONRenderer:")
+        self.time_it(rows, options["repeat"], (("DRF", drf), ("rápido", fast)))
+        self.stdout.write("Solo renderizado:")
+        self.time_it(
+            rows,
+            options["repeat"],
+            (
+                ("JSONRenderer", lambda: renderer.render(data)),
+                ("ORJSONRenderer", lambda: ORJSONRenderer().render(data)),
+            ),
+        )
+        self.stdout.write(self.style.SUCCESS("Salida JSON idéntica byte a byte"))
+
+    def time_it(self, rows, repeat, variants):
+        for label, render in variants:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                render()
+                timings.append(time.perf_counter() - started)
+            median = statistics.median(timings)
+            self.stdout.write(
+                f"  {label}: mediana {median * 1000:.1f} ms, "
+                f"{rows / max(median, 1e-9):,.0f} filas/s"
+            )
@@ -0,0 +1,88 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.expenses.cache import invalidate_expense_cache
+from apps.expenses.importers import (
+    IMPORT_FORMATS,
+    ImportFileError,
+    decode_lines,
+    guess_format,
+    import_expenses,
+    read_rows,
+)
+from apps.manager.models import User
+
+
+class Command(BaseCommand):
+    help = "Importa gastos desde un archivo CSV o NDJSON en lotes de bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", dest="file_format", choices=IMPORT_FORMATS)
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Usuario asignado a las filas sin columna 'user'",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--rejects",
+            help="Archivo NDJSON donde escribir las filas rechazadas y sus errores",
+        )
+        parser.add_argument("--created-by", default="import_expenses")
+
+    def handle(self, *args, **options):
+        default_user = None
+        if options["user"] is not None:
+            default_user = User.objects.filter(pk=options["user"]).first()
+            if default_user is None:
+                raise CommandError(f"Usuario {options['user']} no encontrado")
+
+        file_format = options["file_format"] or guess_format(options["path"])
+        rejects = open(options["rejects"], "w") if options["rejects"] else None
+        started = time.perf_counter()
+
+        def on_reject(number, row, errors):
+            if rejects is not None:
+                rejects.write(
+                    json.dumps(
+                        {"row": number, "data": row, "errors": errors},
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+
+        def on_progress(stats):
+            rate = stats["read"] / max(time.perf_counter() - started, 1e-9)
+            self.stdout.write(
+                f"{stats['read']} leídas, {stats['imported']} importadas, "
+                f"{stats['rejected']} rechazadas ({rate:.0f} filas/s)"
+            )
+
+        try:
+            with open(options["path"], "rb") as stream:
+                stats = import_expenses(
+                    read_rows(decode_lines(stream), file_format),
+                    created_by=options["created_by"],
+                    default_user=default_user,
+                    batch_size=options["batch_size"],
+                    on_reject=on_reject,
+                    on_progress=on_progress,
+                )
+        except ImportFileError as exc:
+            invalidate_expense_cache(exc.stats["users"])
+            on_progress(exc.stats)
+            raise CommandError(str(exc))
+        finally:
+            if rejects is not None:
+                rejects.close()
+
+        invalidate_expense_cache(stats["users"])
+        on_progress(stats)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Importación terminada en {time.perf_counter() - started:.1f} s"
+            )
+        )
@@ -0,0 +1,220 @@
+import asyncio
+import io
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from apps.authentication.utils import generate_access_token
+from apps.expenses.models import Expense
+from apps.manager.models import User
+
+from .benchmark_expense_indexes import Command as IndexBenchmark
+
+ENDPOINTS = {
+    # (ruta WSGI/DRF, ruta ASGI, query string)
+    "list": ("/api/expenses/expenses/", "/api/expenses/async/expenses/", ""),
+    "detail": (
+        "/api/expenses/expenses/{pk}/",
+        "/api/expenses/async/expenses/{pk}/",
+        "",
+    ),
+    "summary": (
+        "/api/expenses/expenses/summary/",
+        "/api/expenses/async/expenses/summary/",
+        "period=week",
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara peticiones/s y latencias de las lecturas de gastos servidas "
+        "por la aplicación WSGI (un worker con N hilos) y la ASGI (un bucle "
+        "de eventos), con la misma concurrencia de clientes y una latencia "
+        "artificial por consulta que simula una BD lenta."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", choices=list(ENDPOINTS), default="list")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--wsgi-threads",
+            type=int,
+            default=4,
+            help="Hilos del worker WSGI (p. ej. gunicorn --threads)",
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=20.0,
+            help="Milisegundos añadidos a cada consulta",
+        )
+        parser.add_argument("--rows", type=int, default=5_000)
+        parser.add_argument(
+            "--keep", action="store_true", help="No borrar los datos sintéticos"
+        )
+
+    def handle(self, *args, **options):
+        from config.asgi import application as asgi_application
+        from config.wsgi import application as wsgi_application
+
+        seeder = IndexBenchmark(stdout=self.stdout, stderr=self.stderr)
+        users = seeder.seed_users(10)
+        seeder.seed_expenses(random.Random(42), users, options["rows"], 10_000)
+
+        user = User.objects.get(pk=users[0])
+        pk = Expense.objects.filter(user=user, is_active=True).values_list(
+            "pk", flat=True
+        )[0]
+        wsgi_path, asgi_path, query = ENDPOINTS[options["endpoint"]]
+        headers = {"Authorization": f"Bearer {generate_access_token(user)}"}
+
+        latency = options["db_latency"] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            # La conexión de cada hilo se reabre en cada petición
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        connection_created.connect(add_latency)
+        # Sin caché de respuestas: medir la ruta de lectura, no la caché
+        try:
+            with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+                wsgi = self.run_wsgi(
+                    wsgi_application,
+                    wsgi_path.format(pk=pk),
+                    query,
+                    headers,
+                    options,
+                )
+                asgi = asyncio.run(
+                    self.run_asgi(
+                        asgi_application,
+                        asgi_path.format(pk=pk),
+                        query,
+                        headers,
+                        options,
+                    )
+                )
+        finally:
+            connection_created.disconnect(add_latency)
+            connections.close_all()
+            if not options["keep"]:
+                seeder.cleanup()
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"\n== {options['endpoint']}: {options['requests']} peticiones, "
+                f"concurrencia {options['concurrency']}, "
+                f"+{options['db_latency']:g} ms por consulta =="
+            )
+        )
+        self.report(f"WSGI ({options['wsgi_threads']} hilos)", *wsgi)
+        self.report("ASGI (1 bucle de eventos)", *asgi)
+        self.stdout.write(
+            self.style.SUCCESS(f"ASGI/WSGI: x{asgi[0] / max(wsgi[0], 1e-9):.1f}")
+        )
+
+    def run_wsgi(self, application, path, query, headers, options):
+        # Los clientes esperan turno en los hilos del worker, como en gunicorn
+        slots = threading.BoundedSemaphore(options["wsgi_threads"])
+
+        def request():
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": query,
+                "SERVER_NAME": "localhost",
+                "HTTP_HOST": "localhost",
+                "wsgi.input": io.BytesIO(),
+            }
+            for name, value in headers.items():
+                environ[f"HTTP_{name.upper().replace('-', '_')}"] = value
+            setup_testing_defaults(environ)
+
+            started = time.perf_counter()
+            statuses = []
+            with slots:
+                body = application(
+                    environ, lambda status, *args: statuses.append(status)
+                )
+                b"".join(body)
+                body.close()
+            self.check_status(int(statuses[0].split()[0]))
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            latencies = list(pool.map(lambda _: request(), range(options["requests"])))
+        return options["requests"] / (time.perf_counter() - started), latencies
+
+    async def run_asgi(self, application, path, query, headers, options):
+        in_flight = asyncio.Semaphore(options["concurrency"])
+        scope_headers = [(b"host", b"localhost")] + [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ]
+
+        async def request():
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode(),
+                "query_string": query.encode(),
+                "headers": scope_headers,
+                "server": ("localhost", 80),
+                "client": ("127.0.0.1", 0),
+            }
+            messages = [{"type": "http.request", "body": b"", "more_body": False}]
+            statuses = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # Sin desconexión: Django cancela esta espera al responder
+                await asyncio.Future()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            async with in_flight:
+                started = time.perf_counter()
+                await application(scope, receive, send)
+            self.check_status(statuses[0])
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(request() for _ in range(options["requests"]))
+        )
+        return options["requests"] / (time.perf_counter() - started), latencies
+
+    def check_status(self, status):
+        if status != 200:
+            raise CommandError(f"Respuesta inesperada: HTTP {status}")
+
+    def report(self, label, throughput, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{label}: {throughput:.1f} peticiones/s, "
+            f"p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {p95 * 1000:.0f} ms"
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.expenses.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero la tabla ExpenseMonthlyRollup a partir de Expense."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="Reconstruir solo este usuario (se puede repetir)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = rebuild_rollups(options["users"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{created} filas de rollup generadas"))
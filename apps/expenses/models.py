@@ -38,6 +38,57 @@ class Expense(AuditableMixins):
         verbose_name = _("Expense")
         verbose_name_plural = _("Expenses")
         ordering = ["-payment_date"]
+        indexes = [
+            # Filtro por tipo y rango de fechas dentro de un usuario
+            models.Index(
+                fields=["user", "type", "payment_date"],
+                name="expense_user_type_date_idx",
+            ),
+            # Índices parciales: solo filas activas (SQLite y PostgreSQL), las
+            # únicas que lista ExpenseFilter
+            models.Index(
+                fields=["user", "-payment_date", "-id"],
+                name="expense_active_user_date_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["-payment_date", "-id"],
+                name="expense_active_date_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Sincronización incremental: cambios por usuario en orden
+            models.Index(
+                fields=["user", "updated_date", "id"],
+                name="expense_user_updated_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.description} - {self.amount} ({self.type})"
+
+
+class ExpenseMonthlyRollup(models.Model):
+    """Totales mensuales precalculados de gastos activos por usuario y tipo."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name=_("User"))
+    type = models.CharField(
+        verbose_name=_("Type"), max_length=50, choices=EXPENSE_TYPE_CHOICES
+    )
+    month = models.DateField(verbose_name=_("Month"))
+    total = models.DecimalField(
+        verbose_name=_("Total"), max_digits=14, decimal_places=2, default=0
+    )
+    count = models.IntegerField(verbose_name=_("Count"), default=0)
+
+    class Meta:
+        verbose_name = _("Expense monthly rollup")
+        verbose_name_plural = _("Expense monthly rollups")
+        ordering = ["month", "type"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "type", "month"], name="expense_rollup_unique"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m} {self.type}: {self.total}"
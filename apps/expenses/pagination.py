@@ -0,0 +1,97 @@
+import datetime
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from apps.common.pagination import KeysetPagination
+
+
+class ExpensePagination(KeysetPagination):
+    # Igual que Expense.Meta.ordering, con id para desempatar
+    ordering = ("-payment_date", "-id")
+
+
+class ExpenseChangesPagination(KeysetPagination):
+    """
+    Recorre los cambios en orden de updated_date (altas, ediciones y bajas
+    lógicas) y devuelve una marca de agua para la siguiente sincronización.
+
+    ?since=<fecha ISO> arranca desde un instante (incluido); ?cursor= sigue
+    una página siguiente o una marca de agua anterior.
+
+    updated_date se fija en Python antes del COMMIT, así que una transacción
+    lenta puede confirmar filas con fecha anterior a otras ya servidas. La
+    marca de agua retrocede EXPENSES_SYNC["OVERLAP_SECONDS"] respecto a la
+    última fila para volver a leerlas: el cliente recibe de nuevo las de
+    esa ventana y debe aplicarlas de forma idempotente (por id), y
+    sincronizar hasta que next sea null.
+    """
+
+    ordering = ("updated_date", "id")
+    since_query_param = "since"
+    invalid_since_message = _("Enter a valid ISO 8601 date or datetime.")
+
+    def get_start_position(self, request, model):
+        position = super().get_start_position(request, model)
+        if position is not None:
+            return position
+
+        value = request.query_params.get(self.since_query_param)
+        if not value:
+            return None
+        try:
+            since = parse_datetime(value)
+            if since is None:
+                day = parse_date(value)
+                if day is not None:
+                    since = datetime.datetime.combine(day, datetime.time())
+        except ValueError:
+            since = None
+        if since is None:
+            raise ValidationError(
+                {self.since_query_param: [self.invalid_since_message]}
+            )
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        # id 0 precede a cualquier fila: incluye los cambios de ese instante
+        return [since, 0]
+
+    def get_overlap(self):
+        seconds = getattr(settings, "EXPENSES_SYNC", {}).get("OVERLAP_SECONDS", 60)
+        return datetime.timedelta(seconds=seconds)
+
+    def get_watermark(self):
+        if self.last_position is None:
+            return None
+        if self.last_position is self.start_position:
+            # Página vacía: la marca de agua recibida ya incluía el margen
+            return self.encode_cursor(self.start_position)
+        position = [self.last_position[0] - self.get_overlap(), 0]
+        if self.start_position is not None and position < self.start_position:
+            # Nunca por detrás del punto de partida
+            position = self.start_position
+        return self.encode_cursor(position)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("watermark", self.get_watermark()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["watermark"] = {
+            "type": "string",
+            "nullable": True,
+        }
+        return response_schema
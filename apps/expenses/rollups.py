@@ -0,0 +1,123 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.expenses.models import Expense, ExpenseMonthlyRollup
+
+
+def expense_month(payment_date, tz=None):
+    # Mismo criterio que TruncMonth: mes en la zona horaria actual
+    if timezone.is_aware(payment_date):
+        payment_date = payment_date.astimezone(tz or timezone.get_current_timezone())
+    return payment_date.date().replace(day=1)
+
+
+def rollup_key(expense):
+    """Clave y aporte de un gasto al rollup, o None si no está activo."""
+    if expense is None or not expense.is_active:
+        return None
+    return (
+        (expense.user_id, expense.type, expense_month(expense.payment_date)),
+        expense.amount,
+    )
+
+
+def record_expense_change(before, after):
+    """Aplica la diferencia entre dos rollup_key() (antes/después de guardar)."""
+    deltas = defaultdict(lambda: [Decimal("0"), 0])
+    if before is not None:
+        deltas[before[0]][0] -= Decimal(before[1])
+        deltas[before[0]][1] -= 1
+    if after is not None:
+        deltas[after[0]][0] += Decimal(after[1])
+        deltas[after[0]][1] += 1
+    apply_rollup_deltas(deltas)
+
+
+def record_expenses_created(expenses):
+    """Suma al rollup una lista de gastos recién creados (p. ej. bulk_create)."""
+    record_rows_created(
+        (expense.user_id, expense.type, expense.payment_date, expense.amount)
+        for expense in expenses
+        if expense.is_active
+    )
+
+
+def record_rows_created(rows):
+    """Igual que record_expenses_created con tuplas (user_id, type, fecha, monto)."""
+    tz = timezone.get_current_timezone()
+    deltas = defaultdict(lambda: [Decimal("0"), 0])
+    for user_id, expense_type, payment_date, amount in rows:
+        delta = deltas[(user_id, expense_type, expense_month(payment_date, tz))]
+        delta[0] += Decimal(amount)
+        delta[1] += 1
+    apply_rollup_deltas(deltas)
+
+
+def aggregate_by_month(queryset):
+    """Agrupa un queryset de Expense por (usuario, tipo, mes) en la BD."""
+    return (
+        queryset.order_by()
+        .annotate(month=TruncMonth("payment_date", output_field=DateField()))
+        .values("user_id", "type", "month")
+        .annotate(total=Sum("amount"), count=Count("id"))
+    )
+
+
+def record_queryset_change(queryset, sign):
+    """Suma (sign=1) o resta (sign=-1) del rollup los gastos del queryset."""
+    deltas = {
+        (row["user_id"], row["type"], row["month"]): [
+            sign * row["total"],
+            sign * row["count"],
+        ]
+        for row in aggregate_by_month(queryset)
+    }
+    apply_rollup_deltas(deltas)
+
+
+def apply_rollup_deltas(deltas):
+    for (user_id, expense_type, month), (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+        lookup = {"user_id": user_id, "type": expense_type, "month": month}
+        updated = ExpenseMonthlyRollup.objects.filter(**lookup).update(
+            total=F("total") + amount, count=F("count") + count
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                ExpenseMonthlyRollup.objects.create(**lookup, total=amount, count=count)
+        except IntegrityError:
+            # Otra petición creó la fila entre el UPDATE y el INSERT
+            ExpenseMonthlyRollup.objects.filter(**lookup).update(
+                total=F("total") + amount, count=F("count") + count
+            )
+
+
+def rebuild_rollups(user_ids=None, batch_size=1000):
+    """Reconstruye desde cero los rollups (de todos o de algunos usuarios)."""
+    expenses = Expense.objects.filter(is_active=True)
+    existing = ExpenseMonthlyRollup.objects.all()
+    if user_ids:
+        expenses = expenses.filter(user_id__in=user_ids)
+        existing = existing.filter(user_id__in=user_ids)
+
+    with transaction.atomic():
+        existing.delete()
+        rollups = (
+            ExpenseMonthlyRollup(
+                user_id=row["user_id"],
+                type=row["type"],
+                month=row["month"],
+                total=row["total"],
+                count=row["count"],
+            )
+            for row in aggregate_by_month(expenses)
+        )
+        return len(ExpenseMonthlyRollup.objects.bulk_create(rollups, batch_size))
@@ -1,6 +1,12 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from apps.manager.models import User
 from ..models import Expense
+from ..validators import (
+    validate_expense_amount,
+    validate_expense_owner,
+    validate_expense_type,
+)
 
 
 class ExpenseListSerializer(serializers.ModelSerializer):
@@ -10,24 +16,86 @@ class ExpenseListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class ExpenseCreateSerializer(serializers.ModelSerializer):
+class ExpenseChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Expense
+        fields = (
+            "id",
+            "amount",
+            "description",
+            "type",
+            "user",
+            "payment_date",
+            "is_active",
+            "updated_date",
+            "deleted_date",
+        )
+        read_only_fields = fields
+
+
+class PrefetchedUserField(serializers.PrimaryKeyRelatedField):
+    """Resuelve el usuario desde la caché que precarga la creación masiva."""
+
+    def to_internal_value(self, data):
+        users = getattr(self.parent, "user_cache", None)
+        if users is not None:
+            try:
+                return users[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class ExpenseOwnerSerializerMixin:
+    """El gasto es del usuario de la petición, salvo que este sea staff."""
+
+    def validate_user(self, value):
+        request = self.context.get("request")
+        if request is not None:
+            validate_expense_owner(value, request.user)
+        return value
+
+
+class ExpenseBulkCreateSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        # Una sola consulta de usuarios para toda la lista
+        if isinstance(data, list):
+            ids = set()
+            for item in data:
+                try:
+                    ids.add(int(item.get("user")))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+            self.child.user_cache = User.objects.in_bulk(ids)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            self.child.user_cache = None
+
+    def create(self, validated_data):
+        batch_size = self.context.get("batch_size")
+        expenses = [Expense(**attrs) for attrs in validated_data]
+        return Expense.objects.bulk_create(expenses, batch_size=batch_size)
+
+
+class ExpenseCreateSerializer(ExpenseOwnerSerializerMixin, serializers.ModelSerializer):
+    user = PrefetchedUserField(queryset=User.objects.all(), label=_("User"))
+
     class Meta:
         model = Expense
         fields = ("amount", "description", "type", "user", "payment_date")
+        list_serializer_class = ExpenseBulkCreateSerializer
 
     def validate_amount(self, value):
-        if value < 0:
-            raise serializers.ValidationError(_("El monto no puede ser negativo."))
+        validate_expense_amount(value)
         return value
 
     def validate_type(self, value):
-        valid_choices = dict(Expense.EXPENSE_TYPE_CHOICES).keys()
-        if value not in valid_choices:
-            raise serializers.ValidationError(_("Tipo de gasto no válido."))
+        validate_expense_type(value)
         return value
 
 
-class ExpenseUpdateSerializer(serializers.ModelSerializer):
+class ExpenseUpdateSerializer(ExpenseOwnerSerializerMixin, serializers.ModelSerializer):
     payment_date = serializers.DateTimeField(required=True)
 
     class Meta:
@@ -37,16 +105,27 @@ class ExpenseUpdateSerializer(serializers.ModelSerializer):
 
     # Validación: amount >= 0
     def validate_amount(self, value):
-        if value < 0:
-            raise serializers.ValidationError(_("El monto no puede ser negativo."))
+        validate_expense_amount(value)
         return value
 
     def validate_type(self, value):
-        valid_choices = dict(Expense.EXPENSE_TYPE_CHOICES).keys()
-        if value not in valid_choices:
-            raise serializers.ValidationError(_("Tipo de gasto no válido."))
+        validate_expense_type(value)
         return value
 
     # def validate(self, data):
     #
     #     return data
+
+
+class ExpenseSummaryTotalsSerializer(serializers.Serializer):
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    count = serializers.IntegerField()
+    average = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ExpenseSummarySerializer(serializers.Serializer):
+    period = serializers.DateField()
+    type = serializers.CharField()
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    count = serializers.IntegerField()
+    average = serializers.DecimalField(max_digits=14, decimal_places=2)
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.db.models import Avg, Count, DateField, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+SUMMARY_PERIODS = {
+    "day": TruncDay,
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+# Parámetros de ExpenseFilter que impiden usar los rollups mensuales
+SUMMARY_DATE_PARAMS = ("start_date", "end_date", "date_range")
+
+
+def summarize_expenses(queryset, period):
+    """Totales, conteos y promedios por periodo y tipo, calculados en la BD."""
+    trunc = SUMMARY_PERIODS[period]
+    return (
+        queryset.order_by()
+        .annotate(period=trunc("payment_date", output_field=DateField()))
+        .values("period", "type")
+        .annotate(total=Sum("amount"), count=Count("id"), average=Avg("amount"))
+        .order_by("period", "type")
+    )
+
+
+def summarize_rollups(queryset):
+    """Mismo resultado que summarize_expenses(..., "month") desde ExpenseMonthlyRollup."""
+    for row in rollup_totals(queryset):
+        yield rollup_summary_row(row)
+
+
+def rollup_totals(queryset):
+    return (
+        queryset.filter(count__gt=0)
+        .values("month", "type")
+        .annotate(total=Sum("total"), count=Sum("count"))
+        .order_by("month", "type")
+    )
+
+
+def rollup_summary_row(row):
+    return {
+        "period": row["month"],
+        "type": row["type"],
+        "total": row["total"],
+        "count": row["count"],
+        "average": row["total"] / row["count"],
+    }
+
+
+def summary_totals(rows):
+    total = sum((row["total"] for row in rows), Decimal("0"))
+    count = sum(row["count"] for row in rows)
+    return {
+        "total": total,
+        "count": count,
+        "average": total / count if count else Decimal("0"),
+    }
@@ -1,3 +1,907 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.authentication.cache import token_cache
+from apps.authentication.utils import generate_access_token
+from apps.common.cache import get_generation
+from apps.common.fast_serializer import FastListSerializer
+from apps.expenses.admin import ExpenseAdmin
+from apps.expenses.cache import CACHE_NAMESPACE
+from apps.expenses.models import Expense, ExpenseMonthlyRollup
+from apps.expenses.rollups import rebuild_rollups, record_expense_change, rollup_key
+from apps.expenses.serializers import ExpenseListSerializer
+from apps.expenses.summary import summarize_expenses, summarize_rollups
+from apps.expenses.views.views import ExpenseViewSet
+from apps.manager.models import User
+
+EXPENSES_URL = "/api/expenses/expenses/"
+
+
+def expense_url(expense):
+    return f"{EXPENSES_URL}{expense.pk}/"
+
+
+class ExpenseAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create(email="ana@example.com")
+        self.other = User.objects.create(email="luis@example.com")
+        self.authenticate(self.user)
+
+    def authenticate(self, user):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {generate_access_token(user)}"
+        )
+
+    def create_expense(self, user=None, **fields):
+        fields.setdefault("amount", Decimal("10.00"))
+        fields.setdefault("description", "gasto")
+        fields.setdefault("type", "otros")
+        return Expense.objects.create(user=user or self.user, **fields)
+
+    def post_expense(self, **fields):
+        data = {
+            "amount": "10.00",
+            "description": "gasto",
+            "type": "otros",
+            "user": self.user.pk,
+            "payment_date": "2025-01-15T10:00:00Z",
+            **fields,
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(EXPENSES_URL, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+
+class KeysetPaginationTests(ExpenseAPITestCase):
+    def test_pages_cover_every_row_once_with_ties(self):
+        day = timezone.now() - datetime.timedelta(days=1)
+        for index in range(7):
+            # Tres filas comparten payment_date: desempata el id
+            payment_date = day if index < 3 else day - datetime.timedelta(hours=index)
+            self.create_expense(description=f"e{index}", payment_date=payment_date)
+        expected = list(
+            Expense.objects.filter(user=self.user)
+            .order_by("-payment_date", "-id")
+            .values_list("description", flat=True)
+        )
+
+        seen, url = [], f"{EXPENSES_URL}?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen.extend(row["description"] for row in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(EXPENSES_URL, {"cursor": "no-es-un-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_schema_describes_the_page_object(self):
+        response = self.client.get("/swagger.json")
+        schema = response.json()["paths"]["/expenses/expenses/"]["get"]["responses"][
+            "200"
+        ]["schema"]
+
+        self.assertEqual(schema["type"], "object")
+        self.assertEqual(set(schema["properties"]), {"next", "results"})
+        self.assertEqual(
+            schema["properties"]["results"]["items"],
+            {"$ref": "#/definitions/ExpenseList"},
+        )
+
+
+class SummaryTests(ExpenseAPITestCase):
+    url = f"{EXPENSES_URL}summary/"
+
+    def setUp(self):
+        super().setUp()
+        for day, amount, type in (
+            (6, "10.00", "ocio"),  # lunes
+            (7, "5.00", "ocio"),
+            (8, "2.50", "salud"),
+            (20, "4.00", "ocio"),
+        ):
+            self.create_expense(
+                amount=Decimal(amount),
+                type=type,
+                payment_date=datetime.datetime(
+                    2025, 1, day, 12, tzinfo=datetime.timezone.utc
+                ),
+            )
+        # Filas creadas sin pasar por la vista: el rollup se reconstruye
+        rebuild_rollups()
+
+    def summarize(self, period):
+        response = self.client.get(self.url, {"period": period})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (row["period"], row["type"], row["total"], row["count"])
+            for row in response.data["results"]
+        ]
+
+    def test_groups_by_day(self):
+        self.assertEqual(
+            self.summarize("day"),
+            [
+                ("2025-01-06", "ocio", "10.00", 1),
+                ("2025-01-07", "ocio", "5.00", 1),
+                ("2025-01-08", "salud", "2.50", 1),
+                ("2025-01-20", "ocio", "4.00", 1),
+            ],
+        )
+
+    def test_groups_by_week_starting_on_monday(self):
+        self.assertEqual(
+            self.summarize("week"),
+            [
+                ("2025-01-06", "ocio", "15.00", 2),
+                ("2025-01-06", "salud", "2.50", 1),
+                ("2025-01-20", "ocio", "4.00", 1),
+            ],
+        )
+
+    def test_groups_by_month_with_totals(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data["period"], "month")
+        self.assertEqual(
+            self.summarize("month"),
+            [("2025-01-01", "ocio", "19.00", 3), ("2025-01-01", "salud", "2.50", 1)],
+        )
+        self.assertEqual(
+            response.data["totals"],
+            {"total": "21.50", "count": 4, "average": "5.38"},
+        )
+
+    def test_invalid_period_is_a_bad_request(self):
+        response = self.client.get(self.url, {"period": "year"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RollupTests(ExpenseAPITestCase):
+    def rollup_rows(self):
+        return [
+            (row["period"], row["type"], row["total"], row["count"])
+            for row in summarize_rollups(
+                ExpenseMonthlyRollup.objects.filter(user=self.user)
+            )
+        ]
+
+    def database_rows(self):
+        return [
+            (row["period"], row["type"], row["total"], row["count"])
+            for row in summarize_expenses(
+                Expense.objects.filter(user=self.user, is_active=True), "month"
+            )
+        ]
+
+    def create_with_rollup(self, **fields):
+        expense = self.create_expense(**fields)
+        record_expense_change(None, rollup_key(expense))
+        return expense
+
+    def test_rollups_follow_creates_updates_and_deletes(self):
+        self.post_expense(amount="10.00")
+        self.post_expense(amount="5.50", type="ocio")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"{EXPENSES_URL}bulk/",
+                [
+                    {
+                        "amount": "3.00",
+                        "description": "lote",
+                        "type": "otros",
+                        "user": self.user.pk,
+                        "payment_date": "2025-02-01T12:00:00Z",
+                    }
+                ],
+                format="json",
+            )
+        moved, deleted = Expense.objects.filter(user=self.user).order_by("id")[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                expense_url(moved),
+                {
+                    "amount": "20.00",
+                    "description": "movido",
+                    "type": "salud",
+                    "payment_date": "2025-03-10T09:00:00Z",
+                },
+                format="json",
+            )
+            self.client.delete(expense_url(deleted))
+
+        self.assertEqual(self.rollup_rows(), self.database_rows())
+        self.assertEqual(len(self.database_rows()), 2)
+
+    def test_delete_subtracts_from_rollups(self):
+        self.create_with_rollup(amount=Decimal("10.00"))
+        deleted = self.create_with_rollup(amount=Decimal("5.50"), type="ocio")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(expense_url(deleted))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.rollup_rows(), self.database_rows())
+        self.assertEqual(len(self.rollup_rows()), 1)
+
+    def test_admin_actions_update_rollups(self):
+        expenses = [self.create_with_rollup(amount=Decimal(n)) for n in "123"]
+        admin = ExpenseAdmin(Expense, AdminSite())
+        request = RequestFactory().post("/admin/")
+        request.user = self.other
+        selected = Expense.objects.filter(pk__in=[e.pk for e in expenses[:2]])
+
+        with mock.patch.object(admin, "message_user"):
+            admin.soft_delete_selected(request, selected)
+            self.assertEqual(self.rollup_rows(), self.database_rows())
+            admin.activate_selected(request, selected)
+            self.assertEqual(self.rollup_rows(), self.database_rows())
+
+        self.assertEqual(self.rollup_rows()[0][2:], (Decimal("6.00"), 3))
+
+    def test_summary_from_rollups_matches_database_summary(self):
+        self.create_with_rollup(amount=Decimal("10.00"))
+        self.create_with_rollup(
+            amount=Decimal("2.25"),
+            payment_date=datetime.datetime(2025, 1, 20, tzinfo=datetime.timezone.utc),
+        )
+
+        from_rollups = self.client.get(f"{EXPENSES_URL}summary/")
+        # Un filtro de fecha obliga a agregar sobre Expense
+        from_database = self.client.get(
+            f"{EXPENSES_URL}summary/", {"start_date": "2000-01-01"}
+        )
+
+        self.assertEqual(from_rollups.data["results"], from_database.data["results"])
+        self.assertEqual(from_rollups.data["totals"]["total"], "12.25")
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.create_with_rollup(amount=Decimal("10.00"))
+        self.create_with_rollup(amount=Decimal("4.00"), type="ocio")
+        incremental = self.rollup_rows()
+
+        rebuild_rollups([self.user.pk])
+
+        self.assertEqual(self.rollup_rows(), incremental)
+
+
+class BulkCreateTests(ExpenseAPITestCase):
+    url = f"{EXPENSES_URL}bulk/"
+
+    def item(self, **fields):
+        return {
+            "amount": "1.00",
+            "description": "lote",
+            "type": "otros",
+            "user": self.user.pk,
+            **fields,
+        }
+
+    def test_creates_every_item(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                [self.item(), self.item(amount="2.50", type="ocio")],
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 2)
+
+    def test_errors_are_keyed_by_item_index(self):
+        response = self.client.post(
+            self.url, [self.item(), {"amount": "x"}], format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.json()["errors"]), ["1"])
+        # Todo o nada: el elemento válido tampoco se guarda
+        self.assertFalse(Expense.objects.exists())
+
+    def test_items_for_other_users_are_rejected(self):
+        response = self.client.post(
+            self.url, [self.item(), self.item(user=self.other.pk)], format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.json()["errors"]), ["1"])
+        self.assertIn("user", response.json()["errors"]["1"])
+        self.assertFalse(Expense.objects.exists())
+
+    def test_staff_creates_for_other_users(self):
+        self.user.is_staff = True
+        self.user.save()
+        token_cache.clear()
+        before = get_generation(CACHE_NAMESPACE, self.other.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url, [self.item(user=self.other.pk)], format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Expense.objects.filter(user=self.other).count(), 1)
+        # La caché del propietario de cada gasto también se invalida
+        self.assertNotEqual(get_generation(CACHE_NAMESPACE, self.other.pk), before)
+
+    @override_settings(EXPENSES_BULK_CREATE={"MAX_ITEMS": 2})
+    def test_rejects_lists_over_max_items(self):
+        response = self.client.post(self.url, [self.item()] * 3, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_schema_describes_errors_as_object(self):
+        response = self.client.get("/swagger.json")
+        errors = response.json()["paths"]["/expenses/expenses/bulk/"]["post"][
+            "responses"
+        ]["400"]["schema"]["properties"]["errors"]
+
+        self.assertEqual(errors["type"], "object")
+        self.assertIn("additionalProperties", errors)
+
+
+class ExportTests(ExpenseAPITestCase):
+    url = f"{EXPENSES_URL}export/"
+
+    def setUp(self):
+        super().setUp()
+        self.create_expense(
+            amount=Decimal("10.50"),
+            description="café, con coma",
+            payment_date=datetime.datetime(
+                2025, 1, 15, 10, tzinfo=datetime.timezone.utc
+            ),
+        )
+        self.create_expense(
+            amount=Decimal("3.00"),
+            type="ocio",
+            payment_date=datetime.datetime(2024, 6, 1, tzinfo=datetime.timezone.utc),
+        )
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_csv_uses_the_api_text_format(self):
+        rows = list(csv.reader(io.StringIO(self.export())))
+
+        self.assertEqual(
+            rows[0], ["id", "amount", "description", "type", "user", "payment_date"]
+        )
+        self.assertEqual(
+            rows[1][1:],
+            [
+                "10.50",
+                "café, con coma",
+                "otros",
+                str(self.user.pk),
+                "2025-01-15T10:00:00Z",
+            ],
+        )
+        self.assertEqual(len(rows), 3)
+
+    def test_ndjson_has_one_object_per_line(self):
+        lines = self.export(output="ndjson").splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])["amount"], "3.00")
+        self.assertEqual(json.loads(lines[1])["type"], "ocio")
+
+    @override_settings(EXPENSES_EXPORT_CHUNK_SIZE=1)
+    def test_rows_are_streamed_in_chunks(self):
+        response = self.client.get(self.url, {"output": "ndjson"})
+
+        self.assertEqual(len(list(response.streaming_content)), 2)
+
+    def test_applies_the_list_filters(self):
+        lines = self.export(output="ndjson", start_date="2025-01-01").splitlines()
+
+        self.assertEqual([json.loads(line)["amount"] for line in lines], ["10.50"])
+
+    def test_accept_header_does_not_trigger_406(self):
+        response = self.client.get(self.url, HTTP_ACCEPT="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+
+    def test_invalid_output_is_a_bad_request(self):
+        response = self.client.get(self.url, {"output": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ImportTests(ExpenseAPITestCase):
+    url = f"{EXPENSES_URL}import/"
+
+    def upload(self, content, name="gastos.csv"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                self.url,
+                {"file": SimpleUploadedFile(name, content)},
+                format="multipart",
+            )
+
+    def test_csv_rows_are_imported_and_rejects_reported(self):
+        response = self.upload(
+            (
+                "amount,description,type,payment_date\n"
+                "1.00,sin usuario,otros,2025-01-15T10:00:00Z\n"
+                "-1,negativo,otros,\n"
+                "2.00,tipo,desconocido,\n"
+            ).encode()
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data["imported"], response.data["rejected"]), (1, 2))
+        self.assertEqual([reject["row"] for reject in response.data["rejects"]], [2, 3])
+        self.assertIn("type", response.data["rejects"][1]["errors"])
+        # Las filas sin usuario son del que importa
+        self.assertEqual(Expense.objects.get().user, self.user)
+
+    def test_ndjson_rows_are_imported(self):
+        response = self.upload(
+            b'{"amount": "1.50", "description": "json", "type": "ocio"}\nnot json\n',
+            name="gastos.ndjson",
+        )
+
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(response.data["rejected"], 1)
+
+    def test_import_updates_rollups(self):
+        self.upload(
+            b"amount,description,type,payment_date\n"
+            b"1.00,a,otros,2025-01-15T10:00:00Z\n"
+            b"2.00,b,otros,2025-01-16T10:00:00Z\n"
+            b"4.00,c,ocio,2025-02-01T10:00:00Z\n"
+        )
+
+        rollups = ExpenseMonthlyRollup.objects.filter(user=self.user)
+        self.assertEqual(
+            list(summarize_rollups(rollups)),
+            list(summarize_expenses(Expense.objects.filter(user=self.user), "month")),
+        )
+
+    def test_missing_file_is_a_bad_request(self):
+        response = self.client.post(self.url, {}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_staff_cannot_import_for_other_users(self):
+        response = self.upload(
+            (
+                "amount,description,type,user\n"
+                f"1.00,mío,otros,{self.user.pk}\n"
+                f"2.00,ajeno,otros,{self.other.pk}\n"
+                "3.00,sin usuario,otros,\n"
+            ).encode()
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual(response.data["rejects"][0]["row"], 2)
+        self.assertFalse(Expense.objects.filter(user=self.other).exists())
+
+    def test_staff_can_import_for_other_users(self):
+        self.user.is_staff = True
+        self.user.save()
+        token_cache.clear()
+
+        response = self.upload(
+            f"amount,description,type,user\n2.00,ajeno,otros,{self.other.pk}\n".encode()
+        )
+
+        self.assertEqual(response.data["imported"], 1)
+        self.assertTrue(Expense.objects.filter(user=self.other).exists())
+
+    def test_invalid_utf8_is_a_bad_request(self):
+        response = self.upload(
+            b"\xef\xbb\xbfamount,description,type\n"
+            b"1.00,ok,otros\n"
+            b"2.00,caf\xe9,otros\n"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["line"], 3)
+        self.assertEqual(response.data["byte"], 49)
+        # Las filas anteriores al error ya se importaron
+        self.assertEqual(response.data["imported"], 1)
+
+    def test_malformed_csv_is_a_bad_request(self):
+        huge = b"x" * 200_000
+        response = self.upload(b'amount,description,type\n1.00,"' + huge + b'",otros\n')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["line"], 2)
+
+    def test_management_command_imports_and_writes_rejects(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "gastos.csv")
+            rejects = os.path.join(directory, "rechazos.ndjson")
+            with open(path, "w", encoding="utf-8") as source:
+                source.write("amount,description,type\n1.00,a,otros\nx,b,otros\n")
+
+            call_command(
+                "import_expenses",
+                path,
+                "--user",
+                str(self.user.pk),
+                "--rejects",
+                rejects,
+                stdout=io.StringIO(),
+            )
+
+            with open(rejects, encoding="utf-8") as output:
+                rejected = [json.loads(line) for line in output]
+
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 1)
+        self.assertEqual([reject["row"] for reject in rejected], [2])
+        self.assertIn("amount", rejected[0]["errors"])
+
+
+class OwnerScopeTests(ExpenseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.own = self.create_expense(description="propio")
+        self.foreign = self.create_expense(user=self.other, description="ajeno")
+
+    def test_list_only_returns_own_expenses(self):
+        response = self.client.get(EXPENSES_URL)
+        self.assertEqual(
+            [row["description"] for row in response.data["results"]], ["propio"]
+        )
+
+    def test_foreign_expense_is_not_found(self):
+        self.assertEqual(
+            self.client.get(expense_url(self.foreign)).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            self.client.delete(expense_url(self.foreign)).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_creating_for_another_user_requires_staff(self):
+        data = {"amount": "5.00", "description": "ajeno", "type": "otros"}
+
+        response = self.client.post(
+            EXPENSES_URL, {**data, "user": self.other.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("user", response.data["errors"])
+        self.assertEqual(Expense.objects.filter(user=self.other).count(), 1)
+
+        self.user.is_staff = True
+        self.user.save()
+        token_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                EXPENSES_URL, {**data, "user": self.other.pk}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Expense.objects.filter(user=self.other).count(), 2)
+
+    def test_update_keeps_the_owner(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                expense_url(self.own),
+                {
+                    "amount": "7.00",
+                    "description": "propio",
+                    "type": "otros",
+                    "user": self.other.pk,
+                    "payment_date": "2025-01-15T10:00:00Z",
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.own.refresh_from_db()
+        self.assertEqual(self.own.user, self.user)
+
+    def test_summary_and_export_are_scoped(self):
+        summary = self.client.get(
+            f"{EXPENSES_URL}summary/", {"start_date": "2000-01-01"}
+        )
+        export = self.client.get(f"{EXPENSES_URL}export/", {"output": "ndjson"})
+
+        self.assertEqual(summary.data["totals"]["count"], 1)
+        self.assertEqual(len(b"".join(export.streaming_content).splitlines()), 1)
+
+    def test_scope_all_requires_staff(self):
+        response = self.client.get(EXPENSES_URL, {"scope": "all"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        token_cache.clear()
+        response = self.client.get(EXPENSES_URL, {"scope": "all"})
+        self.assertEqual(
+            sorted(row["description"] for row in response.data["results"]),
+            ["ajeno", "propio"],
+        )
+
+
+class ResponseCacheTests(ExpenseAPITestCase):
+    def test_repeated_request_is_served_from_the_cache(self):
+        self.create_expense()
+        first = self.client.get(f"{EXPENSES_URL}summary/", {"period": "day"})
+
+        with self.assertNumQueries(0):
+            second = self.client.get(f"{EXPENSES_URL}summary/", {"period": "day"})
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_write_invalidates_cached_summary(self):
+        self.post_expense(amount="10.00")
+        first = self.client.get(f"{EXPENSES_URL}summary/")
+        self.assertEqual(first.data["totals"]["count"], 1)
+
+        self.post_expense(amount="4.00")
+        second = self.client.get(f"{EXPENSES_URL}summary/")
+        self.assertEqual(second.data["totals"]["count"], 2)
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+    def test_import_invalidates_cached_list(self):
+        self.assertEqual(self.client.get(EXPENSES_URL).data["results"], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"{EXPENSES_URL}import/",
+                {
+                    "file": SimpleUploadedFile(
+                        "gastos.csv", b"amount,description,type\n1.00,a,otros\n"
+                    )
+                },
+                format="multipart",
+            )
+
+        self.assertEqual(len(self.client.get(EXPENSES_URL).data["results"]), 1)
+
+    def test_admin_action_bumps_generation_after_commit(self):
+        expense = self.create_expense()
+        before = get_generation(CACHE_NAMESPACE, self.user.pk)
+        admin = ExpenseAdmin(Expense, AdminSite())
+        request = RequestFactory().post("/admin/")
+        request.user = self.other
+
+        with mock.patch.object(admin, "message_user"):
+            with self.captureOnCommitCallbacks() as callbacks:
+                admin.soft_delete_selected(
+                    request, Expense.objects.filter(pk=expense.pk)
+                )
+                self.assertEqual(get_generation(CACHE_NAMESPACE, self.user.pk), before)
+            for callback in callbacks:
+                callback()
+
+        self.assertNotEqual(get_generation(CACHE_NAMESPACE, self.user.pk), before)
+
+    def test_list_answers_304_until_a_write(self):
+        expense = self.create_expense()
+        etag = self.client.get(EXPENSES_URL)["ETag"]
+
+        response = self.client.get(EXPENSES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(expense_url(expense))
+        response = self.client.get(EXPENSES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class ConditionalGetTests(ExpenseAPITestCase):
+    def test_list_etag_follows_updates(self):
+        expense = self.create_expense()
+        etag = self.client.get(EXPENSES_URL)["ETag"]
+        self.assertTrue(etag.startswith("W/"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(expense_url(expense), {"amount": "99.00"}, format="json")
+        response = self.client.get(EXPENSES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_answers_304_for_either_validator(self):
+        expense = self.create_expense()
+        response = self.client.get(expense_url(expense))
+
+        by_etag = self.client.get(
+            expense_url(expense), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        by_date = self.client.get(
+            expense_url(expense), HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        self.assertEqual(by_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(by_date.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_of_foreign_expense_is_still_not_found(self):
+        foreign = self.create_expense(user=self.other)
+
+        response = self.client.get(expense_url(foreign), HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ChangesFeedTests(ExpenseAPITestCase):
+    url = f"{EXPENSES_URL}changes/"
+
+    def descriptions(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["description"] for row in response.data["results"]]
+
+    def test_includes_soft_deleted_rows_of_the_owner_only(self):
+        expense = self.create_expense(description="borrado")
+        self.create_expense(user=self.other, description="ajeno")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(expense_url(expense))
+
+        self.assertEqual(self.descriptions(self.client.get(self.url)), ["borrado"])
+
+    def test_watermark_resumes_after_the_last_change(self):
+        self.create_expense(description="primero")
+        watermark = self.client.get(self.url).data["watermark"]
+
+        self.create_expense(description="segundo")
+
+        response = self.client.get(self.url, {"cursor": watermark})
+        # El solape puede repetir filas ya servidas; el cliente las deduplica
+        self.assertIn("segundo", self.descriptions(response))
+
+    def test_watermark_picks_up_rows_committed_late(self):
+        first = self.create_expense(description="primero")
+        watermark = self.client.get(self.url).data["watermark"]
+
+        # Fecha fijada antes del COMMIT: queda por detrás de la ya servida
+        late = self.create_expense(description="tardío")
+        Expense.objects.filter(pk=late.pk).update(
+            updated_date=first.updated_date - datetime.timedelta(seconds=5)
+        )
+
+        response = self.client.get(self.url, {"cursor": watermark})
+        self.assertIn("tardío", self.descriptions(response))
+
+    @override_settings(EXPENSES_SYNC={"OVERLAP_SECONDS": 60})
+    def test_empty_page_keeps_watermark(self):
+        expense = self.create_expense()
+        Expense.objects.filter(pk=expense.pk).update(
+            updated_date=timezone.now() - datetime.timedelta(hours=1)
+        )
+        since = (timezone.now() - datetime.timedelta(minutes=10)).isoformat()
+
+        response = self.client.get(self.url, {"since": since})
+        self.assertEqual(self.descriptions(response), [])
+        watermark = response.data["watermark"]
+
+        response = self.client.get(self.url, {"cursor": watermark})
+        self.assertEqual(self.descriptions(response), [])
+        self.assertEqual(response.data["watermark"], watermark)
+
+    def test_since_skips_older_changes(self):
+        old = self.create_expense(description="antiguo")
+        Expense.objects.filter(pk=old.pk).update(
+            updated_date=timezone.now() - datetime.timedelta(days=2)
+        )
+        self.create_expense(description="reciente")
+        since = (timezone.now() - datetime.timedelta(days=1)).date().isoformat()
+
+        response = self.client.get(self.url, {"since": since})
+
+        self.assertEqual(self.descriptions(response), ["reciente"])
+
+    def test_invalid_since_is_a_bad_request(self):
+        response = self.client.get(self.url, {"since": "ayer"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FastListTests(ExpenseAPITestCase):
+    def test_fast_list_is_byte_identical_to_the_serializer(self):
+        self.assertIsNotNone(FastListSerializer.compile(ExpenseListSerializer))
+        for amount, description, payment_date in (
+            ("0.10", "café ☕", "2025-01-15T10:00:00.123456Z"),
+            ("1234567.89", "línea separada", "2024-02-29T23:59:59Z"),
+            ("5", "", "2025-06-01T00:00:00+02:00"),
+        ):
+            self.create_expense(
+                amount=Decimal(amount),
+                description=description,
+                payment_date=parse_datetime(payment_date),
+            )
+
+        fast = self.client.get(EXPENSES_URL, {"page_size": 2})
+        cache.clear()
+        with mock.patch.object(ExpenseViewSet, "fast_list", False):
+            slow = self.client.get(EXPENSES_URL, {"page_size": 2})
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+
+
+class AsyncViewsTests(ExpenseAPITestCase):
+    ASYNC_URL = "/api/expenses/async/expenses/"
+
+    def setUp(self):
+        super().setUp()
+        for day in (6, 7, 20):
+            self.create_expense(
+                payment_date=datetime.datetime(2025, 1, day, 12, tzinfo=datetime.UTC)
+            )
+        self.foreign = self.create_expense(user=self.other)
+        rebuild_rollups()
+        self.headers = {"Authorization": f"Bearer {generate_access_token(self.user)}"}
+
+    async def test_list_matches_the_viewset(self):
+        response = await self.async_client.get(
+            self.ASYNC_URL, {"page_size": 2}, headers=self.headers
+        )
+        expected = await sync_to_async(self.client.get)(EXPENSES_URL, {"page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], expected.json()["results"])
+        self.assertIn(self.ASYNC_URL, response.json()["next"])
+
+    async def test_retrieve_is_scoped_to_the_owner(self):
+        expense = await Expense.objects.filter(user=self.user).afirst()
+
+        response = await self.async_client.get(
+            f"{self.ASYNC_URL}{expense.pk}/", headers=self.headers
+        )
+        expected = await sync_to_async(self.client.get)(f"{EXPENSES_URL}{expense.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected.content)
+
+        response = await self.async_client.get(
+            f"{self.ASYNC_URL}{self.foreign.pk}/", headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_summary_matches_the_viewset(self):
+        for period in ("day", "month"):
+            response = await self.async_client.get(
+                f"{self.ASYNC_URL}summary/", {"period": period}, headers=self.headers
+            )
+            expected = await sync_to_async(self.client.get)(
+                f"{EXPENSES_URL}summary/", {"period": period}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), expected.json())
+
+        response = await self.async_client.get(
+            f"{self.ASYNC_URL}summary/", {"period": "year"}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(self.ASYNC_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
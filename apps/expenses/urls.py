@@ -1,7 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from apps.expenses.views.views import *
-
+from apps.expenses.views.async_views import (
+    AsyncExpenseDetailView,
+    AsyncExpenseListView,
+    AsyncExpenseSummaryView,
+)
 
 router = DefaultRouter()
 router.register(r"expenses", ExpenseViewSet, basename="expenses")
@@ -9,4 +13,20 @@ router.register(r"expenses", ExpenseViewSet, basename="expenses")
 
 urlpatterns = [
     path("", include(router.urls)),
+    # Lecturas async (ASGI) con la misma salida que el ViewSet
+    path(
+        "async/expenses/",
+        AsyncExpenseListView.as_view(),
+        name="expenses-async-list",
+    ),
+    path(
+        "async/expenses/summary/",
+        AsyncExpenseSummaryView.as_view(),
+        name="expenses-async-summary",
+    ),
+    path(
+        "async/expenses/<int:pk>/",
+        AsyncExpenseDetailView.as_view(),
+        name="expenses-async-detail",
+    ),
 ]
@@ -0,0 +1,22 @@
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+
+from .models import EXPENSE_TYPE_CHOICES
+
+VALID_EXPENSE_TYPES = frozenset(dict(EXPENSE_TYPE_CHOICES))
+
+
+def validate_expense_amount(value):
+    if value < 0:
+        raise ValidationError(_("El monto no puede ser negativo."))
+
+
+def validate_expense_type(value):
+    if value not in VALID_EXPENSE_TYPES:
+        raise ValidationError(_("Tipo de gasto no válido."))
+
+
+def validate_expense_owner(user, request_user):
+    # Solo staff puede registrar gastos a nombre de otro usuario
+    if user != request_user and not request_user.is_staff:
+        raise ValidationError(_("Solo puedes registrar gastos a tu nombre."))
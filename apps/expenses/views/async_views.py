@@ -0,0 +1,100 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+from django_filters.utils import translate_validation
+from rest_framework import status
+
+from apps.common.async_views import AsyncAPIView
+from apps.common.fast_serializer import FastListSerializer
+from apps.expenses.filters import ExpenseFilter, ExpenseMonthlyRollupFilter
+from apps.expenses.models import Expense
+from apps.expenses.pagination import ExpensePagination
+from apps.expenses.serializers import ExpenseListSerializer
+from apps.expenses.summary import (
+    SUMMARY_PERIODS,
+    rollup_summary_row,
+    rollup_totals,
+    summarize_expenses,
+)
+from apps.expenses.views.mixins import ExpenseScopeMixin
+
+
+class AsyncExpenseView(ExpenseScopeMixin, AsyncAPIView):
+    """
+    Lecturas de gastos sobre el ORM async, para servir con ASGI: cada
+    petición que espera a la BD no bloquea un hilo del servidor.
+    """
+
+    def get_queryset(self):
+        return self.scope_to_owner(Expense.objects.filter(is_active=True))
+
+    async def filter_queryset(self, queryset, filterset_class=ExpenseFilter):
+        filterset = filterset_class(
+            self.request.query_params, queryset=queryset, request=self.request
+        )
+        # La validación del filtro `user` consulta la BD
+        if not await sync_to_async(filterset.is_valid)():
+            raise translate_validation(filterset.errors)
+        return filterset.qs
+
+    def get_fast_serializer(self):
+        return FastListSerializer.compile(ExpenseListSerializer)
+
+
+class AsyncExpenseListView(AsyncExpenseView):
+    async def get(self, request, *args, **kwargs):
+        queryset = await self.filter_queryset(self.get_queryset())
+        serializer = self.get_fast_serializer()
+        paginator = ExpensePagination()
+        rows = serializer.values(queryset, paginator.position_fields)
+
+        page = await paginator.apaginate_queryset(rows, request, view=self)
+        if page is None:
+            return self.render(
+                serializer.to_representation(
+                    [
+                        row
+                        async for row in rows.order_by(*paginator.ordering).aiterator()
+                    ]
+                )
+            )
+        response = paginator.get_paginated_response(serializer.to_representation(page))
+        return self.render(response.data)
+
+
+class AsyncExpenseDetailView(AsyncExpenseView):
+    async def get(self, request, pk, *args, **kwargs):
+        serializer = self.get_fast_serializer()
+        try:
+            row = await serializer.values(self.get_queryset()).aget(pk=pk)
+        except Expense.DoesNotExist:
+            raise Http404
+        return self.render(serializer.to_representation([row])[0])
+
+
+class AsyncExpenseSummaryView(AsyncExpenseView):
+    async def get(self, request, *args, **kwargs):
+        period = request.query_params.get("period", "month")
+        if period not in SUMMARY_PERIODS:
+            return self.render(
+                {
+                    "message": _("Invalid summary period"),
+                    "errors": {"period": list(SUMMARY_PERIODS)},
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = await self.filter_queryset(self.get_queryset())
+        if self.use_summary_rollups(period):
+            rollups = await self.filter_queryset(
+                self.get_rollup_queryset(), ExpenseMonthlyRollupFilter
+            )
+            rows = [
+                rollup_summary_row(row)
+                async for row in rollup_totals(rollups).aiterator()
+            ]
+        else:
+            rows = [
+                row async for row in summarize_expenses(queryset, period).aiterator()
+            ]
+        return self.render(self.get_summary_data(period, rows))
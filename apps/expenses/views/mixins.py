@@ -0,0 +1,42 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import PermissionDenied
+
+from apps.expenses.models import ExpenseMonthlyRollup
+from apps.expenses.serializers import (
+    ExpenseSummarySerializer,
+    ExpenseSummaryTotalsSerializer,
+)
+from apps.expenses.summary import SUMMARY_DATE_PARAMS, summary_totals
+
+
+class ExpenseScopeMixin:
+    """Alcance por propietario y resumen compartidos por las vistas sync y async."""
+
+    def is_admin_wide(self):
+        # ?scope=all: vista de todos los usuarios, solo para staff
+        if self.request.query_params.get("scope") != "all":
+            return False
+        if not self.request.user.is_staff:
+            raise PermissionDenied(_("Only staff users can list all expenses"))
+        return True
+
+    def scope_to_owner(self, queryset):
+        if self.is_admin_wide():
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+    def use_summary_rollups(self, period):
+        # Sin filtros de fecha basta con leer los rollups: O(meses)
+        return period == "month" and not any(
+            param in self.request.query_params for param in SUMMARY_DATE_PARAMS
+        )
+
+    def get_rollup_queryset(self):
+        return self.scope_to_owner(ExpenseMonthlyRollup.objects.all())
+
+    def get_summary_data(self, period, rows):
+        return {
+            "period": period,
+            "results": ExpenseSummarySerializer(rows, many=True).data,
+            "totals": ExpenseSummaryTotalsSerializer(summary_totals(rows)).data,
+        }
@@ -1,20 +1,51 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
 from drf_yasg import openapi as oa
 from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from apps.common.utils import get_user_fullname
 from apps.common.views import BaseModelViewSet
 from apps.expenses.models import Expense
 from apps.expenses.serializers import (
+    ExpenseChangeSerializer,
     ExpenseListSerializer,
     ExpenseCreateSerializer,
     ExpenseUpdateSerializer,
 )
 
-from apps.expenses.filters import ExpenseFilter
+from apps.expenses.cache import CACHE_NAMESPACE
+from apps.expenses.export import EXPORT_FORMATS, EXPORT_STREAMS
+from apps.expenses.importers import (
+    IMPORT_FORMATS,
+    ImportFileError,
+    decode_lines,
+    guess_format,
+    import_expenses,
+    read_rows,
+)
+from apps.expenses.filters import ExpenseFilter, ExpenseMonthlyRollupFilter
+from apps.expenses.views.mixins import ExpenseScopeMixin
+from apps.expenses.pagination import ExpenseChangesPagination, ExpensePagination
+from apps.expenses.rollups import (
+    record_expense_change,
+    record_expenses_created,
+    rollup_key,
+)
+from apps.expenses.summary import (
+    SUMMARY_PERIODS,
+    summarize_expenses,
+    summarize_rollups,
+)
 
 
-class ExpenseViewSet(BaseModelViewSet):
+class ExpenseViewSet(ExpenseScopeMixin, BaseModelViewSet):
     """
     API endpoints for management of expenses
     """
@@ -23,19 +54,74 @@ class ExpenseViewSet(BaseModelViewSet):
     serializer_class = ExpenseListSerializer
     permission_classes = [IsAuthenticated]
     filterset_class = ExpenseFilter
+    pagination_class = ExpensePagination
+    cache_namespace = CACHE_NAMESPACE
+    fast_list = True
+    # changes queda en la primaria: un cursor no puede saltarse filas que la
+    # réplica aún no tiene
+    replica_actions = ("list", "retrieve", "summary", "export")
+
+    def get_cache_owner(self):
+        return "all" if self.is_admin_wide() else self.request.user.pk
+
+    def get_cache_owners(self, instance):
+        expenses = instance if isinstance(instance, list) else [instance]
+        return {self.request.user.pk, *(expense.user_id for expense in expenses)}
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Expense.objects.none()
+        if self.action == "changes":
+            return self.scope_to_owner(Expense.objects.all())
+        return self.scope_to_owner(super().get_queryset())
 
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
             return ExpenseListSerializer
-        if self.action == "create":
+        if self.action in ["create", "bulk_create"]:
             return ExpenseCreateSerializer
         if self.action in ["update", "partial_update"]:
             return ExpenseUpdateSerializer
+        if self.action == "changes":
+            return ExpenseChangeSerializer
         return ExpenseListSerializer
 
+    def perform_content_negotiation(self, request, force=False):
+        # La exportación genera su propia respuesta (CSV/NDJSON), no usa renderers
+        if self.action == "export":
+            force = True
+        return super().perform_content_negotiation(request, force)
+
+    # Mantener ExpenseMonthlyRollup en la misma transacción que el gasto
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+            created = serializer.instance
+            record_expenses_created(created if isinstance(created, list) else [created])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            before = rollup_key(serializer.instance)
+            super().perform_update(serializer)
+            record_expense_change(before, rollup_key(serializer.instance))
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            before = rollup_key(instance)
+            super().perform_destroy(instance)
+            record_expense_change(before, rollup_key(instance))
+
     @swagger_auto_schema(
         operation_description="List all expenses with optional filters",
         manual_parameters=[
+            oa.Parameter(
+                name="scope",
+                in_=oa.IN_QUERY,
+                description="'all' to include every user's expenses (staff only)",
+                type=oa.TYPE_STRING,
+                required=False,
+                enum=["all"],
+            ),
             oa.Parameter(
                 name="date_range",
                 in_=oa.IN_QUERY,
@@ -60,6 +146,20 @@ class ExpenseViewSet(BaseModelViewSet):
                 format="date",
                 required=False,
             ),
+            oa.Parameter(
+                name="cursor",
+                in_=oa.IN_QUERY,
+                description="Opaque cursor returned in `next` by the previous page",
+                type=oa.TYPE_STRING,
+                required=False,
+            ),
+            oa.Parameter(
+                name="page_size",
+                in_=oa.IN_QUERY,
+                description="Number of expenses per page (max 1000)",
+                type=oa.TYPE_INTEGER,
+                required=False,
+            ),
             oa.Parameter(
                 name="Authorization",
                 in_=oa.IN_HEADER,
@@ -68,10 +168,9 @@ class ExpenseViewSet(BaseModelViewSet):
                 required=True,
             ),
         ],
+        # Sin 200 explícito: drf_yasg lo deriva de
+        # ExpensePagination.get_paginated_response_schema() ({next, results})
         responses={
-            200: oa.Response(
-                description="List of expenses", schema=ExpenseListSerializer(many=True)
-            ),
             403: oa.Response(
                 description="Forbidden",
                 schema=oa.Schema(
@@ -82,7 +181,7 @@ class ExpenseViewSet(BaseModelViewSet):
         },
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        return self.cached_response(request, super().list, *args, **kwargs)
 
     @swagger_auto_schema(
         operation_description="Retrieve a specific expense",
@@ -167,6 +266,82 @@ class ExpenseViewSet(BaseModelViewSet):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    @swagger_auto_schema(
+        operation_description="Create many expenses in one request (all or nothing)",
+        request_body=ExpenseCreateSerializer(many=True),
+        manual_parameters=[
+            oa.Parameter(
+                name="Authorization",
+                in_=oa.IN_HEADER,
+                description="Bearer <access_token>",
+                type=oa.TYPE_STRING,
+                required=True,
+            ),
+        ],
+        responses={
+            201: oa.Response(
+                description="Expenses created successfully",
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={
+                        "message": oa.Schema(type=oa.TYPE_STRING),
+                        "count": oa.Schema(type=oa.TYPE_INTEGER),
+                    },
+                ),
+            ),
+            400: oa.Response(
+                description=(
+                    "Bad request. errors maps the index of each invalid item "
+                    "(as a string) to its field errors, or holds "
+                    "non_field_errors if the body is not a valid list"
+                ),
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={
+                        "message": oa.Schema(type=oa.TYPE_STRING),
+                        "errors": oa.Schema(
+                            type=oa.TYPE_OBJECT,
+                            additional_properties=oa.Schema(type=oa.TYPE_OBJECT),
+                        ),
+                    },
+                ),
+            ),
+            403: oa.Response(
+                description="Forbidden",
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={"detail": oa.Schema(type=oa.TYPE_STRING)},
+                ),
+            ),
+        },
+    )
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request, *args, **kwargs):
+        config = getattr(settings, "EXPENSES_BULK_CREATE", {})
+        serializer = self.get_serializer(
+            data=request.data,
+            many=True,
+            max_length=config.get("MAX_ITEMS", 10000),
+        )
+        serializer.context["batch_size"] = config.get("BATCH_SIZE", 500)
+
+        if serializer.is_valid():
+            self.perform_create(serializer)
+            return Response(
+                {
+                    "message": _("Expenses created successfully"),
+                    "count": len(serializer.instance),
+                },
+                status=status.HTTP_201_CREATED,
+            )
+        return Response(
+            {
+                "message": _("Expenses could not be created"),
+                "errors": serializer.errors,
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
     @swagger_auto_schema(
         operation_description="Update an existing expense",
         request_body=ExpenseUpdateSerializer,
@@ -261,3 +436,416 @@ class ExpenseViewSet(BaseModelViewSet):
 
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @swagger_auto_schema(
+        operation_description="Totals, counts and averages per period and type",
+        manual_parameters=[
+            oa.Parameter(
+                name="period",
+                in_=oa.IN_QUERY,
+                description="Grouping period (day, week, month). Default: month",
+                type=oa.TYPE_STRING,
+                required=False,
+                enum=["day", "week", "month"],
+            ),
+            oa.Parameter(
+                name="scope",
+                in_=oa.IN_QUERY,
+                description="'all' to include every user's expenses (staff only)",
+                type=oa.TYPE_STRING,
+                required=False,
+                enum=["all"],
+            ),
+            oa.Parameter(
+                name="date_range",
+                in_=oa.IN_QUERY,
+                description="Filter by date range (last_week, last_month, last_3_months)",
+                type=oa.TYPE_STRING,
+                required=False,
+                enum=["last_week", "last_month", "last_3_months"],
+            ),
+            oa.Parameter(
+                name="start_date",
+                in_=oa.IN_QUERY,
+                description="Start date for custom range (YYYY-MM-DD)",
+                type=oa.TYPE_STRING,
+                format="date",
+                required=False,
+            ),
+            oa.Parameter(
+                name="end_date",
+                in_=oa.IN_QUERY,
+                description="End date for custom range (YYYY-MM-DD)",
+                type=oa.TYPE_STRING,
+                format="date",
+                required=False,
+            ),
+            oa.Parameter(
+                name="Authorization",
+                in_=oa.IN_HEADER,
+                description="Bearer <access_token>",
+                type=oa.TYPE_STRING,
+                required=True,
+            ),
+        ],
+        responses={
+            200: oa.Response(
+                description="Expense summary",
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={
+                        "period": oa.Schema(type=oa.TYPE_STRING),
+                        "results": oa.Schema(
+                            type=oa.TYPE_ARRAY,
+                            items=oa.Schema(type=oa.TYPE_OBJECT),
+                        ),
+                        "totals": oa.Schema(type=oa.TYPE_OBJECT),
+                    },
+                ),
+            ),
+            400: oa.Response(
+                description="Bad request",
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={
+                        "message": oa.Schema(type=oa.TYPE_STRING),
+                        "errors": oa.Schema(type=oa.TYPE_OBJECT),
+                    },
+                ),
+            ),
+        },
+    )
+    @action(detail=False, methods=["get"])
+    def summary(self, request, *args, **kwargs):
+        return self.cached_response(request, self.build_summary, *args, **kwargs)
+
+    def build_summary(self, request, *args, **kwargs):
+        period = request.query_params.get("period", "month")
+        if period not in SUMMARY_PERIODS:
+            return Response(
+                {
+                    "message": _("Invalid summary period"),
+                    "errors": {"period": list(SUMMARY_PERIODS)},
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.use_summary_rollups(period):
+            rollups = ExpenseMonthlyRollupFilter(
+                request.query_params,
+                queryset=self.get_rollup_queryset(),
+                request=request,
+            ).qs
+            rows = list(summarize_rollups(rollups))
+        else:
+            rows = list(summarize_expenses(queryset, period))
+
+        return Response(self.get_summary_data(period, rows), status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Expenses created, updated or soft-deleted since a timestamp or a "
+            "previous watermark, oldest change first. The watermark overlaps "
+            "the last changes served, so they may be returned again: apply "
+            "them by id and keep following 'next' until it is null"
+        ),
+        manual_parameters=[
+            oa.Parameter(
+                name="since",
+                in_=oa.IN_QUERY,
+                description="Start of the sync window (ISO 8601 date or datetime, inclusive)",
+                type=oa.TYPE_STRING,
+                format="date-time",
+                required=False,
+            ),
+            oa.Parameter(
+                name="cursor",
+                in_=oa.IN_QUERY,
+                description="'watermark' of a previous sync or cursor from 'next'",
+                type=oa.TYPE_STRING,
+                required=False,
+            ),
+            oa.Parameter(
+                name="scope",
+                in_=oa.IN_QUERY,
+                description="'all' to include every user's expenses (staff only)",
+                type=oa.TYPE_STRING,
+                required=False,
+                enum=["all"],
+            ),
+            oa.Parameter(
+                name="Authorization",
+                in_=oa.IN_HEADER,
+                description="Bearer <access_token>",
+                type=oa.TYPE_STRING,
+                required=True,
+            ),
+        ],
+        responses={
+            200: oa.Response(
+                description="Changed expenses",
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={
+                        "next": oa.Schema(type=oa.TYPE_STRING, x_nullable=True),
+                        "watermark": oa.Schema(type=oa.TYPE_STRING, x_nullable=True),
+                        "results": oa.Schema(
+                            type=oa.TYPE_ARRAY,
+                            items=oa.Items(type=oa.TYPE_OBJECT),
+                        ),
+                    },
+                ),
+            ),
+            400: oa.Response(
+                description="Invalid 'since' value",
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={
+                        "since": oa.Schema(
+                            type=oa.TYPE_ARRAY, items=oa.Items(type=oa.TYPE_STRING)
+                        )
+                    },
+                ),
+            ),
+            404: oa.Response(
+                description="Invalid cursor",
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={"detail": oa.Schema(type=oa.TYPE_STRING)},
+                ),
+            ),
+        },
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        pagination_class=ExpenseChangesPagination,
+        filterset_class=None,
+    )
+    def changes(self, request, *args, **kwargs):
+        # Incluye las bajas lógicas para que el cliente las elimine localmente
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @swagger_auto_schema(
+        operation_description="Stream all filtered expenses as CSV or NDJSON",
+        manual_parameters=[
+            oa.Parameter(
+                name="output",
+                in_=oa.IN_QUERY,
+                description="Export format (csv, ndjson). Default: csv",
+                type=oa.TYPE_STRING,
+                required=False,
+                enum=["csv", "ndjson"],
+            ),
+            oa.Parameter(
+                name="scope",
+                in_=oa.IN_QUERY,
+                description="'all' to include every user's expenses (staff only)",
+                type=oa.TYPE_STRING,
+                required=False,
+                enum=["all"],
+            ),
+            oa.Parameter(
+                name="date_range",
+                in_=oa.IN_QUERY,
+                description="Filter by date range (last_week, last_month, last_3_months)",
+                type=oa.TYPE_STRING,
+                required=False,
+                enum=["last_week", "last_month", "last_3_months"],
+            ),
+            oa.Parameter(
+                name="start_date",
+                in_=oa.IN_QUERY,
+                description="Start date for custom range (YYYY-MM-DD)",
+                type=oa.TYPE_STRING,
+                format="date",
+                required=False,
+            ),
+            oa.Parameter(
+                name="end_date",
+                in_=oa.IN_QUERY,
+                description="End date for custom range (YYYY-MM-DD)",
+                type=oa.TYPE_STRING,
+                format="date",
+                required=False,
+            ),
+            oa.Parameter(
+                name="Authorization",
+                in_=oa.IN_HEADER,
+                description="Bearer <access_token>",
+                type=oa.TYPE_STRING,
+                required=True,
+            ),
+        ],
+        responses={
+            200: oa.Response(description="CSV or NDJSON file"),
+            400: oa.Response(
+                description="Bad request",
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={
+                        "message": oa.Schema(type=oa.TYPE_STRING),
+                        "errors": oa.Schema(type=oa.TYPE_OBJECT),
+                    },
+                ),
+            ),
+        },
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {
+                    "message": _("Invalid export format"),
+                    "errors": {"output": ["csv", "ndjson"]},
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by(
+            "-payment_date", "-id"
+        )
+        # El cuerpo se genera tras dispatch(): fijar ya la base de datos elegida
+        queryset = queryset.using(queryset.db)
+        chunk_size = getattr(settings, "EXPENSES_EXPORT_CHUNK_SIZE", 2000)
+
+        response = StreamingHttpResponse(
+            EXPORT_STREAMS[output](queryset, chunk_size),
+            content_type=EXPORT_FORMATS[output],
+        )
+        response["Content-Disposition"] = f'attachment; filename="expenses.{output}"'
+        return response
+
+    @swagger_auto_schema(
+        operation_description="Import expenses from an uploaded CSV or NDJSON file",
+        manual_parameters=[
+            oa.Parameter(
+                name="file",
+                in_=oa.IN_FORM,
+                description="CSV (with header) or NDJSON file",
+                type=oa.TYPE_FILE,
+                required=True,
+            ),
+            oa.Parameter(
+                name="file_format",
+                in_=oa.IN_FORM,
+                description="csv or ndjson. Default: guessed from the file name",
+                type=oa.TYPE_STRING,
+                required=False,
+                enum=["csv", "ndjson"],
+            ),
+            oa.Parameter(
+                name="Authorization",
+                in_=oa.IN_HEADER,
+                description="Bearer <access_token>",
+                type=oa.TYPE_STRING,
+                required=True,
+            ),
+        ],
+        responses={
+            201: oa.Response(
+                description="Import report",
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={
+                        "message": oa.Schema(type=oa.TYPE_STRING),
+                        "read": oa.Schema(type=oa.TYPE_INTEGER),
+                        "imported": oa.Schema(type=oa.TYPE_INTEGER),
+                        "rejected": oa.Schema(type=oa.TYPE_INTEGER),
+                        "rejects": oa.Schema(
+                            type=oa.TYPE_ARRAY,
+                            items=oa.Schema(type=oa.TYPE_OBJECT),
+                        ),
+                    },
+                ),
+            ),
+            400: oa.Response(
+                description=(
+                    "Bad request. If the file cannot be decoded or parsed, "
+                    "errors.file gives the line (and byte) and the counts "
+                    "cover the batches imported before it"
+                ),
+                schema=oa.Schema(
+                    type=oa.TYPE_OBJECT,
+                    properties={
+                        "message": oa.Schema(type=oa.TYPE_STRING),
+                        "errors": oa.Schema(type=oa.TYPE_OBJECT),
+                        "line": oa.Schema(type=oa.TYPE_INTEGER),
+                        "byte": oa.Schema(type=oa.TYPE_INTEGER),
+                        "read": oa.Schema(type=oa.TYPE_INTEGER),
+                        "imported": oa.Schema(type=oa.TYPE_INTEGER),
+                        "rejected": oa.Schema(type=oa.TYPE_INTEGER),
+                    },
+                ),
+            ),
+        },
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+    )
+    def import_file(self, request, *args, **kwargs):
+        upload = request.FILES.get("file")
+        file_format = request.data.get("file_format") or (
+            guess_format(upload.name) if upload else None
+        )
+        if upload is None or file_format not in IMPORT_FORMATS:
+            return Response(
+                {
+                    "message": _("Expenses could not be imported"),
+                    "errors": {"file": [_("A CSV or NDJSON file is required.")]},
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        config = getattr(settings, "EXPENSES_IMPORT", {})
+        max_rejects = config.get("MAX_REPORTED_REJECTS", 100)
+        rejects = []
+
+        def on_reject(number, row, errors):
+            if len(rejects) < max_rejects:
+                rejects.append({"row": number, "errors": errors})
+
+        try:
+            stats = import_expenses(
+                read_rows(decode_lines(upload.file), file_format),
+                created_by=get_user_fullname(request.user),
+                default_user=request.user,
+                # Solo staff puede importar gastos de otros usuarios
+                owner=None if request.user.is_staff else request.user,
+                batch_size=config.get("BATCH_SIZE", 5000),
+                on_reject=on_reject,
+            )
+        except ImportFileError as exc:
+            self.invalidate_cache(exc.stats["users"])
+            return Response(
+                {
+                    "message": _("Expenses could not be imported"),
+                    "errors": {"file": [str(exc)]},
+                    "line": exc.line,
+                    "byte": exc.offset,
+                    "read": exc.stats["read"],
+                    "imported": exc.stats["imported"],
+                    "rejected": exc.stats["rejected"],
+                    "rejects": rejects,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        self.invalidate_cache(stats["users"])
+        return Response(
+            {
+                "message": _("Import finished"),
+                "read": stats["read"],
+                "imported": stats["imported"],
+                "rejected": stats["rejected"],
+                "rejects": rejects,
+            },
+            status=status.HTTP_201_CREATED,
+        )
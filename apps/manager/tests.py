@@ -1,3 +1,78 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from apps.authentication.cache import token_cache
+from apps.authentication.utils import generate_access_token
+from apps.manager.models import User
+from apps.manager.serializers.user_serializers import UserListSerializer
+
+USERS_URL = "/api/user/users/"
+
+
+class UserViewSetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.admin = User.objects.create(email="admin@example.com", is_staff=True)
+        self.user = User.objects.create(email="ana@example.com", first_name="Ana")
+
+    def authenticate(self, user):
+        token = generate_access_token(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return token
+
+    def test_fast_list_matches_the_serializer(self):
+        User.objects.create(email="baja@example.com", is_active=False)
+        self.authenticate(self.user)
+
+        response = self.client.get(USERS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = UserListSerializer(
+            User.objects.filter(is_active=True),
+            many=True,
+            context={"request": APIRequestFactory().get(USERS_URL)},
+        ).data
+        self.assertEqual(
+            sorted(response.json(), key=lambda row: row["email"]),
+            sorted(
+                json.loads(JSONRenderer().render(expected)),
+                key=lambda row: row["email"],
+            ),
+        )
+
+    def test_destroy_drops_the_users_cached_tokens(self):
+        token = self.authenticate(self.user)
+        self.client.get(USERS_URL)
+        self.assertIsNotNone(token_cache.get(token))
+
+        self.authenticate(self.admin)
+        response = self.client.delete(f"{USERS_URL}{self.user.pk}/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(token_cache.get(token))
+
+    def test_only_admins_create_users(self):
+        data = {
+            "username": "nuevo",
+            "email": "nuevo@example.com",
+            "password": "secreta-123",
+        }
+
+        self.authenticate(self.user)
+        response = self.client.post(USERS_URL, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.authenticate(self.admin)
+        response = self.client.post(USERS_URL, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(User.objects.filter(email="nuevo@example.com").exists())
+
+    def test_requires_authentication(self):
+        response = self.client.get(USERS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
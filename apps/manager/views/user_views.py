@@ -13,6 +13,7 @@ from apps.manager.models import User
 
 # viewser base
 from apps.common.views import BaseModelViewSet
+from apps.authentication.cache import token_cache
 
 
 class UserViewSet(BaseModelViewSet):
@@ -23,6 +24,7 @@ class UserViewSet(BaseModelViewSet):
     queryset = User.objects.filter(is_active=True)
     serializer_class = UserListSerializer
     permission_classes = [IsAuthenticated]
+    fast_list = True
 
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
@@ -248,6 +250,7 @@ class UserViewSet(BaseModelViewSet):
         instance = self.get_object()
         instance.is_active = False
         instance.save()
+        token_cache.invalidate_user(instance.pk)
         return Response(
             {"message": "User deleted successfully"}, status=status.HTTP_200_OK
         )
@@ -12,8 +12,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import sys
 import os
+import json
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -90,12 +93,108 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Perfil de base de datos por variables de entorno:
+#   DATABASE_ENGINE=sqlite (por defecto) o postgresql
+#   DATABASE_CONN_MAX_AGE: segundos que se reutiliza la conexión de cada hilo
+#     (0 = una conexión por petición); DATABASE_CONN_HEALTH_CHECKS=0 la desactiva
+#   PostgreSQL: DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD, DATABASE_HOST,
+#     DATABASE_PORT y DATABASE_POOL="min:max" para el pool de psycopg 3
+#     (incompatible con CONN_MAX_AGE > 0: el pool ya reutiliza las conexiones)
+#   SQLite: DATABASE_NAME (ruta), SQLITE_TUNING=0 desactiva WAL y los pragmas,
+#     SQLITE_MMAP_SIZE en bytes, SQLITE_TRANSACTION_MODE (p. ej. IMMEDIATE)
+DATABASE_ENGINE = os.environ.get("DATABASE_ENGINE", "sqlite")
+DATABASE_CONN_MAX_AGE = int(
+    os.environ.get("DATABASE_CONN_MAX_AGE")
+    or (60 if DATABASE_ENGINE == "postgresql" else 0)
+)
+# Comprueba la conexión persistente antes de reutilizarla en cada petición
+DATABASE_CONN_HEALTH_CHECKS = os.environ.get("DATABASE_CONN_HEALTH_CHECKS", "1") != "0"
+
+if DATABASE_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DATABASE_NAME", "expense_tracker"),
+            "USER": os.environ.get("DATABASE_USER", ""),
+            "PASSWORD": os.environ.get("DATABASE_PASSWORD", ""),
+            "HOST": os.environ.get("DATABASE_HOST", ""),
+            "PORT": os.environ.get("DATABASE_PORT", ""),
+            "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DATABASE_CONN_HEALTH_CHECKS,
+            "OPTIONS": {},
+        }
     }
-}
+    if os.environ.get("DATABASE_POOL"):
+        min_size, _, max_size = os.environ["DATABASE_POOL"].partition(":")
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(min_size),
+            "max_size": int(max_size or min_size),
+        }
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+elif DATABASE_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DATABASE_NAME") or BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DATABASE_CONN_HEALTH_CHECKS,
+            "OPTIONS": {
+                # Segundos de espera ante "database is locked"
+                "timeout": 20,
+            },
+        }
+    }
+    if os.environ.get("SQLITE_TUNING", "1") != "0":
+        # WAL: los lectores no bloquean al escritor ni al revés; con WAL,
+        # synchronous=NORMAL solo hace fsync en los checkpoints
+        DATABASES["default"]["OPTIONS"]["init_command"] = (
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))};"
+            "PRAGMA temp_store=MEMORY;"
+        )
+    if os.environ.get("SQLITE_TRANSACTION_MODE"):
+        DATABASES["default"]["OPTIONS"]["transaction_mode"] = os.environ[
+            "SQLITE_TRANSACTION_MODE"
+        ]
+else:
+    raise ImproperlyConfigured(f"DATABASE_ENGINE no soportado: {DATABASE_ENGINE}")
+
+# Réplica de lectura opcional (alias "replica"): mismos ajustes que la
+# primaria salvo DATABASE_REPLICA_NAME/HOST/PORT/USER/PASSWORD. Con SQLite
+# puede ser una copia del fichero. PrimaryReplicaRouter le envía las
+# lecturas de list, retrieve, summary y export; tras escribir, el usuario
+# lee de la primaria DATABASE_REPLICA_STICKY_SECONDS segundos.
+if os.environ.get("DATABASE_REPLICA_NAME") or os.environ.get("DATABASE_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        # En los tests la réplica es la propia base de datos de test
+        "TEST": {"MIRROR": "default"},
+    }
+    for key in ("NAME", "HOST", "PORT", "USER", "PASSWORD"):
+        if os.environ.get(f"DATABASE_REPLICA_{key}"):
+            DATABASES["replica"][key] = os.environ[f"DATABASE_REPLICA_{key}"]
+
+DATABASE_ROUTERS = ["apps.common.db_router.PrimaryReplicaRouter"]
+DATABASE_REPLICA_STICKY_SECONDS = int(
+    os.environ.get("DATABASE_REPLICA_STICKY_SECONDS", 5)
+)
+
+
+# Hashers de contraseñas (los algoritmos por defecto de Django). Uno por
+# algoritmo: el de pbkdf2_sha256 toma las iteraciones de
+# PASSWORD_HASH_ITERATIONS (p. ej. menos en desarrollo y tests)
+PASSWORD_HASHERS = [
+    "apps.authentication.hashers.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# Sin definir: el valor por defecto de Django (1.000.000 en Django 5.2)
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS") or 0) or None
 
 
 # Password validation
@@ -150,4 +249,109 @@ REST_FRAMEWORK = {
     ),
 
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    # orjson si está instalado (misma salida que JSONRenderer/JSONParser de DRF)
+    "DEFAULT_RENDERER_CLASSES": [
+        "apps.common.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.common.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Tamaño de página por defecto de los paginadores por cursor (keyset)
+    "PAGE_SIZE": 50,
+}
+
+# PAGE_SIZE se usa con paginadores declarados por vista (pagination_class)
+SILENCED_SYSTEM_CHECKS = ["rest_framework.W001"]
+
+# Caché en memoria (por proceso) de tokens JWT ya verificados.
+# TTL en segundos; acota el tiempo que otro worker tarda en ver una revocación.
+JWT_AUTH_CACHE = {
+    "MAX_SIZE": 10000,
+    "TTL": 60,
+}
+
+# Índice en memoria (filtro de Bloom) de tokens revocados, uno por worker.
+# REFRESH_INTERVAL en segundos: retraso máximo para ver revocaciones de otros workers.
+JWT_REVOCATION_INDEX = {
+    "CAPACITY": 100000,
+    "ERROR_RATE": 0.001,
+    "REFRESH_INTERVAL": 1.0,
+    "LOOKBACK": 100,
+}
+
+# Keyring de firma de JWT. Sin ACTIVE_KID se firma con SECRET_KEY (HS256) y
+# sin kid; los tokens sin kid se verifican con SECRET_KEY mientras
+# ACCEPT_LEGACY_KID esté activo. Para rotar, añadir la clave nueva, pasarla a
+# ACTIVE_KID y retirar la anterior cuando caduquen sus tokens (7 días por los
+# refresh tokens); para retirar SECRET_KEY, JWT_ACCEPT_LEGACY_KID=0. KEYS, en JSON:
+#   {"2025-01": {"ALGORITHM": "HS256", "SECRET": "..."},
+#    "2025-02": {"ALGORITHM": "EdDSA", "PRIVATE_KEY_FILE": "/ruta/clave.pem"}}
+# Las de clave pública (EdDSA, ES256...) requieren "cryptography" y se
+# publican en /api/auth/jwks/; una clave con solo PUBLIC_KEY solo verifica.
+JWT_KEYS = {
+    "ACTIVE_KID": os.environ.get("JWT_ACTIVE_KID"),
+    "KEYS": json.loads(os.environ.get("JWT_KEYS") or "{}"),
+    "ACCEPT_LEGACY_KID": os.environ.get("JWT_ACCEPT_LEGACY_KID", "1") != "0",
+}
+
+# Creación masiva de gastos (POST /api/expenses/expenses/bulk/)
+EXPENSES_BULK_CREATE = {
+    "BATCH_SIZE": 500,
+    "MAX_ITEMS": 10000,
+}
+
+# Filas leídas por lote al exportar gastos en streaming
+EXPENSES_EXPORT_CHUNK_SIZE = 2000
+
+# Importación de gastos desde CSV/NDJSON (POST /api/expenses/expenses/import/)
+EXPENSES_IMPORT = {
+    "BATCH_SIZE": 5000,
+    "MAX_REPORTED_REJECTS": 100,
+}
+
+# Sincronización incremental (GET /api/expenses/expenses/changes/): la marca
+# de agua retrocede este margen para recoger transacciones confirmadas tarde
+EXPENSES_SYNC = {
+    "OVERLAP_SECONDS": 60,
+}
+
+# Caché compartida (locmem por defecto; en producción p. ej.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "expense-tracker"),
+    }
+}
+
+# Segundos que se guardan las respuestas de listado y resumen de gastos
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Enlaces de los correos de verificación y de restablecimiento
+FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:3000")
+
+# Cola de correos (EmailOutbox) que vacía el comando send_queued_emails
+EMAIL_OUTBOX = {
+    "BATCH_SIZE": 100,
+    "WORKERS": 4,
+    "MAX_ATTEMPTS": 5,
+    # Espera exponencial entre intentos: BACKOFF_BASE * 2^(n-1), hasta BACKOFF_MAX
+    "BACKOFF_BASE": 30,
+    "BACKOFF_MAX": 3600,
+    # Segundos que un worker reserva un correo antes de que otro lo reintente
+    "LEASE": 300,
+}
+
+# Purga de tokens caducados (comando purge_expired_tokens)
+TOKEN_PURGE = {
+    "BATCH_SIZE": 1000,
+    # Segundos de pausa entre lotes
+    "PAUSE": 0.0,
+    # Días que se conservan los correos ya enviados
+    "OUTBOX_RETENTION_DAYS": 7,
 }